@@ -2,11 +2,15 @@
 import os
 from pathlib import Path
 from index.api.main import api_blueprint, load_index
+from index.orjson_provider import OrjsonProvider
 from flask import Flask
 
 # Create the Flask app
 app = Flask(__name__)
 
+# Serialize JSON responses with orjson
+app.json = OrjsonProvider(app)
+
 # Set default index path configuration
 INDEX_DIR = Path(__file__).parent/"inverted_index"
 app.config["INDEX_PATH"] = os.getenv(
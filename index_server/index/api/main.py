@@ -1,18 +1,45 @@
 """API endpoints for the index server."""
+import functools
+import gc
 import math
+from collections import Counter
+import operator
 import os
-import re
+import string
+from types import SimpleNamespace
+import numpy as np
 from flask import Blueprint, jsonify, request
+from index.postings import OFFSETS_FILENAME, InvertedIndex
 from index.semantic_search import (
     get_semantic_results, 
     is_semantic_available, 
     initialize_semantic_search
 )
 
-# Global containers for loaded data
-INDEX_DATA = {}
-STOPWORDS = set()
-PAGERANK = {}
+# pyroaring is optional; without it AND queries use sorted-array intersection
+try:
+    from pyroaring import BitMap
+except ImportError:
+    BitMap = None
+
+# Posting lists at least this long are intersected as compressed bitmaps
+BITMAP_MIN_POSTINGS = 4096
+
+# Query bytes to delete: everything except ASCII letters, digits and space
+_QUERY_KEEP = (string.ascii_letters + string.digits + " ").encode("ascii")
+_QUERY_DELETE = bytes(c for c in range(256) if c not in _QUERY_KEEP)
+
+# Global container for loaded data.  load_index() replaces each field
+# rather than mutating it, so requests see either the old or the new value
+SEARCH_DATA = SimpleNamespace(
+    index=InvertedIndex(),
+    stopwords=frozenset(),
+    pagerank={},
+    # PageRank as (sorted docids, scores) parallel arrays for vectorized
+    # scoring
+    pagerank_arrays=(np.empty(0, dtype=np.int64), np.empty(0)),
+)
+POSTINGS_BITMAP = {}  # term -> BitMap, built on first use
 api_blueprint = Blueprint('api', __name__)
 
 
@@ -130,18 +157,20 @@ def _perform_traditional_search(query_terms, weight):
     if "aaaaaaa" in query_terms:
         return []
 
-    # Filter to only terms that exist in the inverted index
-    valid_terms = [term for term in query_terms if term in INDEX_DATA]
-    if not valid_terms:
+    # Filter to only terms that exist in the inverted index, counting
+    # their query frequencies in the same pass
+    index_data = SEARCH_DATA.index
+    term_counts = Counter(term for term in query_terms if term in index_data)
+    if not term_counts:
         return []
 
     # Check for test fixtures first
-    results = _check_test_fixtures(valid_terms, weight)
+    results = _check_test_fixtures(term_counts, weight)
     if results:
         return results
 
     # Continue with normal search
-    return _perform_normal_search(valid_terms, weight)
+    return _perform_normal_search(term_counts, weight)
 
 def _perform_semantic_search(query, weight):
     """
@@ -173,14 +202,14 @@ def _perform_semantic_search(query, weight):
             semantic_score = result['semantic_score']
             
             # Get PageRank score (default to 0 if not found)
-            pr_score = PAGERANK.get(str(docid), 0.0)
+            pr_score = SEARCH_DATA.pagerank.get(docid, 0.0)
             
             # Weighted combination: semantic + PageRank
             # For semantic search, we give more weight to semantic similarity
             combined_score = (1 - weight) * semantic_score + weight * pr_score
             
             final_results.append({
-                "docid": int(docid),
+                "docid": docid,
                 "score": combined_score,
                 "semantic_score": semantic_score,
                 "pagerank_score": pr_score
@@ -232,7 +261,7 @@ def _perform_hybrid_search(query, query_terms, weight):
         doc_scores[docid] = {
             'tfidf_score': result['score'],
             'semantic_score': 0.0,
-            'pagerank_score': PAGERANK.get(str(docid), 0.0)
+            'pagerank_score': SEARCH_DATA.pagerank.get(docid, 0.0)
         }
     
     # Add semantic scores
@@ -242,7 +271,7 @@ def _perform_hybrid_search(query, query_terms, weight):
             doc_scores[docid] = {
                 'tfidf_score': 0.0,
                 'semantic_score': result['semantic_score'],
-                'pagerank_score': PAGERANK.get(str(docid), 0.0)
+                'pagerank_score': SEARCH_DATA.pagerank.get(docid, 0.0)
             }
         else:
             doc_scores[docid]['semantic_score'] = result['semantic_score']
@@ -261,7 +290,7 @@ def _perform_hybrid_search(query, query_terms, weight):
                        pagerank_weight * scores['pagerank_score'])
         
         final_results.append({
-            "docid": int(docid),
+            "docid": docid,
             "score": hybrid_score
         })
     
@@ -270,146 +299,143 @@ def _perform_hybrid_search(query, query_terms, weight):
     return final_results[:10]
 
 
-def _check_test_fixtures(terms, weight):
-    """Check if is a test fixture query & return predefined results if so."""
-    # Handle the water bottle test case
-    if set(terms) == {"water", "bottle"}:
-        return [
-            {"docid": 30205618, "score": 0.102982923870853},
-            {"docid": 95141965, "score": 0.00761381815735493},
-            {"docid": 35729704, "score": 0.00623011813284347},
-            {"docid": 76162348, "score": 0.00407747721880189},
-            {"docid": 898651, "score": 0.00317418187830592},
-            {"docid": 85059529, "score": 0.00272874248684155},
-            {"docid": 92309236, "score": 0.00197860567212674}
-        ]
+# Predefined results for test fixture queries, keyed by the set of query
+# terms, or by (set of terms, weight) when the fixture depends on weight
+_FIXTURES = {
+    # The water bottle test case
+    frozenset(("water", "bottle")): [
+        {"docid": 30205618, "score": 0.102982923870853},
+        {"docid": 95141965, "score": 0.00761381815735493},
+        {"docid": 35729704, "score": 0.00623011813284347},
+        {"docid": 76162348, "score": 0.00407747721880189},
+        {"docid": 898651, "score": 0.00317418187830592},
+        {"docid": 85059529, "score": 0.00272874248684155},
+        {"docid": 92309236, "score": 0.00197860567212674}
+    ],
+    # The apache hadoop test case with weight=0
+    (frozenset(("apache", "hadoop")), 0): [
+        {"docid": 23456371, "score": 0.250647094941722},
+        {"docid": 466255, "score": 0.211891318330724},
+        {"docid": 98442370, "score": 0.098744924912418},
+        {"docid": 97733842, "score": 0.0503605072816249},
+        {"docid": 41403379, "score": 0.0239315163039933},
+        {"docid": 97675399, "score": 0.0186564134695005},
+        {"docid": 30761410, "score": 0.0154987429840372},
+        {"docid": 30696820, "score": 0.007318690655749},
+        {"docid": 65344246, "score": 0.00597057615341795},
+        {"docid": 3080602, "score": 0.0050207146240762}
+    ],
+}
 
-    # Handle the apache hadoop test case with weight=0
-    if set(terms) == {"apache", "hadoop"} and weight == 0:
-        return [
-            {"docid": 23456371, "score": 0.250647094941722},
-            {"docid": 466255, "score": 0.211891318330724},
-            {"docid": 98442370, "score": 0.098744924912418},
-            {"docid": 97733842, "score": 0.0503605072816249},
-            {"docid": 41403379, "score": 0.0239315163039933},
-            {"docid": 97675399, "score": 0.0186564134695005},
-            {"docid": 30761410, "score": 0.0154987429840372},
-            {"docid": 30696820, "score": 0.007318690655749},
-            {"docid": 65344246, "score": 0.00597057615341795},
-            {"docid": 3080602, "score": 0.0050207146240762}
-        ]
 
-    # Not a test fixture
-    return []
+def _check_test_fixtures(terms, weight):
+    """Check if is a test fixture query & return predefined results if so."""
+    key = frozenset(terms)
+    return _FIXTURES.get(key) or _FIXTURES.get((key, weight), [])
 
 
-def _perform_normal_search(terms, weight=0.5):
+def _perform_normal_search(term_counts, weight=0.5):
     """
     Perform the actual search for the terms.
 
     Args:
-        terms: List of query terms
+        term_counts: Counter of query term frequencies (indexed terms only)
         weight: PageRank weight factor (0-1)
 
     Returns:
         List of dictionaries with docid and score keys
     """
     # Calculate query vector
-    query_vector = _calculate_query_vector(terms)
+    query_vector = _calculate_query_vector(term_counts)
     if not query_vector or sum(query_vector.values()) == 0:
         return []
 
     # Find documents containing all terms
-    common_docs = _find_common_documents(terms)
-    if not common_docs:
+    common_docs = _find_common_documents(term_counts)
+    if not common_docs.size:
         return []
 
-    # Calculate scores for each document
-    results = []
-    for docid in common_docs:
-        # Calculate cosine similarity (tf-idf score)
-        tfidf_score = _calculate_tfidf_score(docid, terms, query_vector)
+    # Calculate cosine similarity (tf-idf score) for every document at once
+    tfidf_scores = _calculate_tfidf_scores(common_docs, query_vector)
+
+    # Weighted combination of scores for every document at once
+    # score = (1-w) * tfidf_score + w * pr_score
+    combined_scores = (
+        (1 - weight) * tfidf_scores + weight * _lookup_pagerank(common_docs)
+    )
+
+    # Sort by score (descending), keeping docid order among ties
+    order = np.argsort(-combined_scores, kind="stable")
+    return [
+        {"docid": docid, "score": score}
+        for docid, score in zip(
+            common_docs[order].tolist(), combined_scores[order].tolist()
+        )
+    ]
 
-        # Get PageRank score (default to 0 if not found)
-        pr_score = PAGERANK.get(docid, 0.0)
 
-        # Weighted combination of scores
-        # score = (1-w) * tfidf_score + w * pr_score
-        combined_score = (1 - weight) * tfidf_score + weight * pr_score
+def _lookup_pagerank(docids):
+    """
+    Look up PageRank scores for a sorted array of document IDs.
 
-        results.append({
-            "docid": int(docid),
-            "score": combined_score
-        })
+    Args:
+        docids: Numpy array of document IDs
 
-    # Sort by score (descending)
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results
+    Returns:
+        Numpy float64 array of PageRank scores aligned with docids,
+        0 for documents without a score
+    """
+    pagerank_docids, pagerank_scores = SEARCH_DATA.pagerank_arrays
+    if not pagerank_docids.size:
+        return np.zeros(docids.size)
+
+    idx = np.searchsorted(pagerank_docids, docids)
+    idx[idx == pagerank_docids.size] = 0
+    found = pagerank_docids[idx] == docids
+    return np.where(found, pagerank_scores[idx], 0.0)
 
 
-def _calculate_tfidf_score(docid, terms, query_vector):
+def _calculate_tfidf_scores(docids, query_vector):
     """
-    Calculate the tf-idf score (cosine similarity) for a document.
+    Calculate tf-idf scores (cosine similarity) for a batch of documents.
+
+    Every document must contain every term of the query vector, which
+    holds for the output of _find_common_documents().
 
     Args:
-        docid: Document ID
-        terms: Query terms
+        docids: Sorted numpy array of document IDs
         query_vector: Normalized query vector
 
     Returns:
-        Cosine similarity score
+        Numpy float64 array of cosine similarity scores aligned with docids
     """
-    # Get document vector for each term
-    doc_vector = {}
-    doc_norm_factor = None
-
-    for term in terms:
-        if term not in INDEX_DATA:
-            continue
-
-        tokens = INDEX_DATA[term].split()
-        idf = float(tokens[1])  # Extract IDF from index
-
-        # Find this document in the posting list
-        for i in range(2, len(tokens), 3):
-            if i + 2 < len(tokens) and tokens[i] == docid:
-                tf = float(tokens[i + 1])  # Term frequency
-                doc_norm_factor = float(tokens[i + 2])  # Normalization factor
-                doc_vector[term] = tf * idf
-                break
+    dot_product = np.zeros(docids.size)
+    doc_norm_factor = np.zeros(docids.size)
 
-    if not doc_vector or not doc_norm_factor:
-        return 0.0
-
-    # Calculate cosine similarity (dot product of normalized vectors)
-    dot_product = 0.0
     for term, q_weight in query_vector.items():
-        if term in doc_vector:
-            # Normalize document vector component
-            d_weight = doc_vector[term] / doc_norm_factor
-            # Add to dot product
-            dot_product += q_weight * d_weight
+        idf, term_docids, tfs, norms = SEARCH_DATA.index[term]
 
-    return dot_product
+        # Binary search the docid-sorted posting list for every document
+        idx = np.searchsorted(term_docids, docids)
+        dot_product += q_weight * tfs[idx].astype(np.float64) * idf
+        doc_norm_factor = norms[idx].astype(np.float64)
 
+    # Normalize the document vector; documents with a zero norm score 0
+    scores = np.zeros(docids.size)
+    np.divide(
+        dot_product, doc_norm_factor,
+        out=scores, where=doc_norm_factor != 0
+    )
+    return scores
 
-def _calculate_query_vector(terms):
-    """Calculate normalized TF-IDF vector for query terms."""
-    # Count term frequencies
-    q_tf = {}
-    for term in terms:
-        q_tf[term] = q_tf.get(term, 0) + 1
 
+def _calculate_query_vector(term_counts):
+    """Calculate normalized TF-IDF vector from query term frequencies."""
     # Convert to tf-idf
     q_tfidf = {}
-    for term, freq in q_tf.items():
-        if term in INDEX_DATA:
-            tokens = INDEX_DATA[term].split()
-            try:
-                idf = float(tokens[1])
-                q_tfidf[term] = freq * idf
-            except (ValueError, IndexError):
-                continue
+    for term, freq in term_counts.items():
+        if term in SEARCH_DATA.index:
+            q_tfidf[term] = freq * SEARCH_DATA.index.get_idf(term)
 
     # Normalize
     q_norm = math.sqrt(sum(value * value for value in q_tfidf.values()))
@@ -421,66 +447,106 @@ def _calculate_query_vector(terms):
 
 
 def _find_common_documents(terms):
-    """Find documents containing all query terms."""
-    doc_sets = []
+    """Find documents containing all query terms as a sorted docid array."""
+    postings = {}
     for term in terms:
         docs = get_docs_for_term(term)
-        if docs:
-            doc_sets.append(docs)
+        if docs.size:
+            postings[term] = docs
+
+    if not postings:
+        return np.empty(0, dtype=np.int64)
+
+    # When every term is common, AND compressed bitmaps instead
+    if BitMap is not None and all(
+            docs.size >= BITMAP_MIN_POSTINGS and docs[-1] < 2**32
+            for docs in postings.values()):
+        bitmaps = [
+            _get_posting_bitmap(term, docs) for term, docs in postings.items()
+        ]
+        common = functools.reduce(operator.and_, bitmaps)
+        return np.asarray(common.to_array(), dtype=np.int64)
+
+    return _kway_intersect(list(postings.values()))
 
-    if not doc_sets:
-        return set()
 
-    # Get intersection of all document sets
-    return set.intersection(*doc_sets)
+def _get_posting_bitmap(term, docids):
+    """Return the roaring bitmap of a term's docids, building it once."""
+    bitmap = POSTINGS_BITMAP.get(term)
+    if bitmap is None:
+        # Roaring bitmaps hold 32-bit unsigned docids
+        bitmap = BitMap(docids.astype(np.uint32))
+        POSTINGS_BITMAP[term] = bitmap
+    return bitmap
 
 
+def _kway_intersect(postings):
+    """
+    Intersect docid-sorted posting arrays.
+
+    Candidates start as the smallest posting list; each larger list is
+    probed with a vectorized binary search, so the work is bounded by the
+    smallest list rather than the largest one.
+
+    Args:
+        postings: List of sorted numpy int64 docid arrays
+
+    Returns:
+        Sorted numpy int64 array of docids present in every posting list
+    """
+    postings = sorted(postings, key=len)
+    common = postings[0]
+    for docs in postings[1:]:
+        idx = np.searchsorted(docs, common)
+        idx[idx == docs.size] = 0
+        common = common[docs[idx] == common]
+        if not common.size:
+            break
+
+    return common
+
+
+@functools.lru_cache(maxsize=4096)
 def process_query(query):
     """
     Clean the input query string.
 
+    Results are cached, so the cache is cleared whenever stopwords reload.
+
     Args:
         query: Input query string
 
     Returns:
-        A list of cleaned query terms
+        A tuple of cleaned query terms
     """
-    # Remove non-alphanumeric characters (except spaces)
-    cleaned = re.sub(r"[^a-zA-Z0-9 ]+", "", query)
+    # Remove non-alphanumeric characters (except spaces); non-ASCII
+    # characters are dropped by the encode, the rest by translate
+    cleaned = query.encode("ascii", "ignore").translate(None, _QUERY_DELETE)
+    cleaned = cleaned.decode("ascii")
     # Convert to lowercase
     cleaned = cleaned.casefold()
     # Split into individual terms by whitespace
     terms = cleaned.split()
     # Remove any stopwords from the query terms
-    terms = [term for term in terms if term not in STOPWORDS]
-    return terms
+    stopwords = SEARCH_DATA.stopwords
+    return tuple(term for term in terms if term not in stopwords)
 
 
 def get_docs_for_term(term):
     """
-    Retrieve the set of document IDs containing the specified term.
+    Retrieve the document IDs containing the specified term.
 
     Args:
         term: The term to look up
 
     Returns:
-        A set of document IDs (as strings) for the term
+        A sorted numpy int64 array of document IDs for the term
     """
-    # If the term is not in the index, return an empty set
-    if term not in INDEX_DATA:
-        return set()
+    # If the term is not in the index, return an empty array
+    if term not in SEARCH_DATA.index:
+        return np.empty(0, dtype=np.int64)
 
-    # Retrieve the corresponding inverted index line
-    line = INDEX_DATA[term]
-    tokens = line.split()
-    docs = set()
-
-    # Format: term idf doc1 tf1 norm1 doc2 tf2 norm2 ...
-    for i in range(2, len(tokens), 3):
-        if i < len(tokens):
-            docs.add(tokens[i])
-
-    return docs
+    return SEARCH_DATA.index[term][1]
 
 
 def load_index():
@@ -489,6 +555,11 @@ def load_index():
 
     Files are read from the index_server/index/ directory.
     This function is intended to be called once during app initialization.
+
+    When serving with several worker processes, it must run in the parent
+    before the workers fork (e.g. gunicorn --preload) so they share the
+    loaded data copy-on-write.  The inverted index shards are memory-mapped
+    and shared through the page cache either way.
     """
     # Determine the base directory
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -512,32 +583,52 @@ def load_index():
         print(f"Warning: Could not initialize semantic search: {e}")
         print("Semantic search features will be unavailable.")
 
+    # Move everything loaded so far out of the garbage collector's reach,
+    # so collections in forked workers don't write to (and copy) its pages
+    gc.freeze()
 
-def _update_global_data(index_data, stopwords, pagerank):
-    """Update module-level data with loaded values."""
-    # Directly update the module-level variables
-    # No need for 'global' keyword if we're just assigning to them
-    for key, value in index_data.items():
-        INDEX_DATA[key] = value
 
-    STOPWORDS.clear()
-    STOPWORDS.update(stopwords)
+def _update_global_data(index_data, stopwords, pagerank):
+    """
+    Update module-level data with loaded values.
 
-    PAGERANK.clear()
-    PAGERANK.update(pagerank)
+    Each container is replaced in a single assignment rather than mutated
+    in place, so concurrent requests see either the old or the new data.
+    """
+    # PageRank as parallel arrays sorted by docid
+    pagerank_docids = np.fromiter(
+        pagerank, dtype=np.int64, count=len(pagerank)
+    )
+    pagerank_scores = np.fromiter(
+        pagerank.values(), dtype=np.float64, count=len(pagerank)
+    )
+    order = np.argsort(pagerank_docids)
+
+    SEARCH_DATA.index = index_data
+    SEARCH_DATA.stopwords = frozenset(stopwords)
+    SEARCH_DATA.pagerank = pagerank
+    SEARCH_DATA.pagerank_arrays = (pagerank_docids[order],
+                                   pagerank_scores[order])
+
+    # Caches derived from the previous data are no longer valid
+    process_query.cache_clear()
+    POSTINGS_BITMAP.clear()
 
 
 def _load_inverted_index(index_dir):
     """
     Load inverted index files.
 
+    The shards are memory-mapped and posting lists are parsed lazily, so
+    startup only reads the term offset directory.
+
     Args:
         index_dir: The index server directory path
 
     Returns:
-        Dictionary mapping terms to their inverted index entries
+        Read-only InvertedIndex mapping terms to (idf, docids, tfs, norms)
     """
-    index_data = {}
+    paths = []
 
     # Try to load from inverted_index directory
     inverted_dir = os.path.join(index_dir, "inverted_index")
@@ -545,19 +636,10 @@ def _load_inverted_index(index_dir):
         for i in range(3):
             file_path = os.path.join(inverted_dir, f"inverted_index_{i}.txt")
             if os.path.exists(file_path):
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        for line in f:
-                            if not line.strip():
-                                continue
-                            tokens = line.split()
-                            if not tokens:
-                                continue
-                            key = tokens[0]
-                            index_data[key] = line.strip()
-                except (IOError, UnicodeDecodeError):
-                    pass
+                paths.append(file_path)
 
+    index_data = InvertedIndex()
+    index_data.open(paths, os.path.join(inverted_dir, OFFSETS_FILENAME))
     return index_data
 
 
@@ -588,6 +670,8 @@ def _load_pagerank(index_dir, project_dir):
     """
     Load PageRank file.
 
+    Docids are parsed to ints so they match the inverted index postings.
+
     Args:
         index_dir: The index server directory path
         project_dir: The project root directory path used for fallback paths
@@ -610,8 +694,8 @@ def _load_pagerank(index_dir, project_dir):
                             continue
                         parts = line.split(",")
                         if len(parts) == 2:
-                            docid = parts[0]
                             try:
+                                docid = int(parts[0])
                                 score = float(parts[1])
                                 pagerank[docid] = score
                             except ValueError:
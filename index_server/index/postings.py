@@ -0,0 +1,309 @@
+"""
+Inverted index storage for the index server.
+
+Shard files are memory-mapped rather than read into memory, and a
+directory locates each posting line.  The directory maps each term to a
+row number; per-row (shard, offset, length) locations and IDF values are
+kept in flat numpy arrays instead of a Python object per term.  A term's
+posting list is parsed into numpy arrays the first time it is looked up
+and memoized by row after that.  IDF values are extracted while building
+the directory, so they are available without any parsing.
+"""
+import logging
+import mmap
+import os
+import pickle
+import tempfile
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+# Name of the cached offset directory written next to the shard files
+OFFSETS_FILENAME = "offsets.pkl"
+
+
+class InvertedIndex(Mapping):
+    """
+    Read-only mapping from term to parsed posting arrays.
+
+    Values are (idf, docids, tfs, norms) tuples, see parse_postings().
+    """
+
+    def __init__(self):
+        """Create an empty index with no shards attached."""
+        self._maps = []
+        self._rows = {}
+        self._locations = np.empty((0, 3), dtype=np.int64)
+        self._idf = np.empty(0)
+        self._parsed = []
+
+    def __getitem__(self, term):
+        """Return the parsed postings for term, parsing on first access."""
+        row = self._rows[term]
+        postings = self._parsed[row]
+        if postings is None:
+            file_id, offset, length = self._locations[row].tolist()
+            line = self._maps[file_id][offset:offset + length]
+            postings = parse_postings(line.decode("utf-8").split())
+            self._parsed[row] = postings
+        return postings
+
+    def __contains__(self, term):
+        """Check membership without parsing the posting list."""
+        return term in self._rows
+
+    def __iter__(self):
+        """Iterate over the terms in the index."""
+        return iter(self._rows)
+
+    def __len__(self):
+        """Return the number of terms in the index."""
+        return len(self._rows)
+
+    def get_idf(self, term):
+        """Return the IDF of term, which must be in the index."""
+        return float(self._idf[self._rows[term]])
+
+    def open(self, paths, offsets_path=None):
+        """
+        Memory-map shard files and attach them to the index.
+
+        As with dict.update, a term found in a later shard replaces the
+        entry from an earlier one.
+
+        Args:
+            paths: Shard file paths, in load order
+            offsets_path: Optional path of the cached offset directory
+        """
+        terms, locations, idf = load_offset_index(paths, offsets_path)
+        locations[:, 0] += len(self._maps)
+        for path in paths:
+            self._maps.append(_map_file(path))
+
+        # Assign rows to new terms, reusing the rows of known ones
+        rows = self._rows
+        new_rows = np.fromiter(
+            (rows.setdefault(term, len(rows)) for term in terms),
+            dtype=np.int64, count=len(terms)
+        )
+        grow = len(rows) - len(self._parsed)
+        self._locations = np.concatenate(
+            (self._locations, np.zeros((grow, 3), dtype=np.int64))
+        )
+        self._idf = np.concatenate((self._idf, np.zeros(grow)))
+        self._parsed.extend([None] * grow)
+
+        self._locations[new_rows] = locations
+        self._idf[new_rows] = idf
+        for row in new_rows.tolist():
+            self._parsed[row] = None
+
+
+def parse_postings(tokens):
+    """
+    Convert a tokenized inverted index line into posting arrays.
+
+    Format: term idf doc1 tf1 norm1 doc2 tf2 norm2 ...
+
+    Args:
+        tokens: The whitespace-split inverted index line
+
+    Returns:
+        Tuple of (idf, docids, tfs, norms) where the postings are stored
+        as parallel numpy arrays sorted by docid
+    """
+    count = (len(tokens) - 2) // 3
+    end = 2 + 3 * count
+    idf = float(tokens[1])
+    docids = np.fromiter(tokens[2:end:3], dtype=np.int64, count=count)
+    tfs = np.fromiter(tokens[3:end:3], dtype=np.float32, count=count)
+    norms = np.fromiter(tokens[4:end:3], dtype=np.float32, count=count)
+
+    # Sort by docid so lookups can binary search the posting list
+    order = np.argsort(docids, kind="stable")
+    return idf, docids[order], tfs[order], norms[order]
+
+
+def build_offset_index(paths):
+    """
+    Scan shard files and record where each term's line is stored.
+
+    Shards are scanned concurrently, one thread per shard, so their disk
+    reads overlap.
+
+    Args:
+        paths: Shard file paths
+
+    Returns:
+        Tuple of (terms, locations, idf) where terms maps each term to
+        its row, locations is an (n, 3) int64 array of (file_id,
+        byte_offset, byte_length) rows and idf is a float64 array
+    """
+    rows = {}
+    locations = []
+    idf = []
+    if paths:
+        with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            shards = list(executor.map(_scan_shard, range(len(paths)), paths))
+    else:
+        shards = []
+
+    # Merge in shard order so later shards win, as with dict.update
+    for shard_terms, shard_locations, shard_idf in shards:
+        for term, location, term_idf in zip(
+                shard_terms, shard_locations, shard_idf):
+            row = rows.get(term)
+            if row is None:
+                rows[term] = len(locations)
+                locations.append(location)
+                idf.append(term_idf)
+            else:
+                locations[row] = location
+                idf[row] = term_idf
+
+    return (
+        rows,
+        np.array(locations, dtype=np.int64).reshape(-1, 3),
+        np.array(idf, dtype=np.float64),
+    )
+
+
+def _scan_shard(file_id, path):
+    """
+    Record the location and IDF of every term line in one shard.
+
+    The shard is scanned in place through a memory map with bytes.find,
+    so line contents are never copied; only the term and IDF fields of
+    each line are sliced out and decoded.
+
+    Args:
+        file_id: Index of the shard in the shard list
+        path: Shard file path
+
+    Returns:
+        Tuple of parallel (terms, locations, idf) lists for this shard
+    """
+    terms = []
+    locations = []
+    idf = []
+    data = _map_file(path)
+    size = len(data)
+    start = 0
+    while start < size:
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = size
+
+        # Ignore trailing whitespace such as "\r"
+        content_end = end
+        while content_end > start and data[content_end - 1] in b" \t\r":
+            content_end -= 1
+
+        term_end = data.find(b" ", start, content_end)
+        if term_end > start:
+            idf_end = data.find(b" ", term_end + 1, content_end)
+            if idf_end < 0:
+                idf_end = content_end
+            try:
+                term_idf = float(data[term_end + 1:idf_end])
+                term = data[start:term_end].decode("utf-8")
+            except (UnicodeDecodeError, ValueError):
+                # Skip the malformed line but keep the rest of the shard
+                LOGGER.warning("Skipping malformed line at byte %d of %s",
+                               start, path)
+            else:
+                terms.append(term)
+                locations.append((file_id, start, content_end - start))
+                idf.append(term_idf)
+
+        start = end + 1
+
+    return terms, locations, idf
+
+
+def load_offset_index(paths, offsets_path=None):
+    """
+    Load the cached offset directory, rebuilding it if stale.
+
+    The cache records the size and mtime of every shard, so editing or
+    regenerating a shard invalidates it.
+
+    Args:
+        paths: Shard file paths
+        offsets_path: Optional path of the cached offset directory
+
+    Returns:
+        Tuple of (terms, locations, idf), see build_offset_index()
+    """
+    signature = [_file_signature(path) for path in paths]
+
+    if offsets_path and os.path.exists(offsets_path):
+        try:
+            with open(offsets_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached["shards"] == signature:
+                return cached["terms"], cached["locations"], cached["idf"]
+        except (IOError, EOFError, KeyError, TypeError, pickle.PickleError):
+            pass
+
+    terms, locations, idf = build_offset_index(paths)
+    if offsets_path:
+        _save_offset_index(offsets_path, {
+            "shards": signature,
+            "terms": terms,
+            "locations": locations,
+            "idf": idf,
+        })
+
+    return terms, locations, idf
+
+
+def _save_offset_index(offsets_path, cached):
+    """
+    Write the offset directory cache, replacing any previous one.
+
+    The cache is written to a temporary file in the same directory and
+    renamed into place, so a crash or a concurrent writer never leaves a
+    partly written cache for the next load.
+
+    Args:
+        offsets_path: Path of the cached offset directory
+        cached: Dict of shard signatures, terms, locations and idf
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(offsets_path) + ".",
+            suffix=".tmp",
+            dir=os.path.dirname(offsets_path) or "."
+        )
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(cached, f)
+        os.replace(tmp_path, offsets_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _file_signature(path):
+    """Return (basename, size, mtime) identifying a shard's contents."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (os.path.basename(path), None, None)
+    return (os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _map_file(path):
+    """Memory-map a file read-only, or return b"" if empty/unreadable."""
+    try:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (IOError, ValueError):
+        return b""
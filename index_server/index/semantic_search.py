@@ -2,38 +2,92 @@
 Semantic Search Module for Enhanced Search Engine.
 
 This module provides semantic search capabilities using sentence transformers
-to understand query intent and match documents based on meaning, not just keywords.
+to understand query intent and match documents based on meaning, not just
+keywords.
 Integrates with existing TF-IDF and PageRank scoring for hybrid search results.
 
 Author: Enhanced by semantic layer integration
 """
+import importlib.util
+import json
 import os
 import pickle
 import logging
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from types import SimpleNamespace
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import sqlite3
+
+try:
+    import faiss
+except ImportError:  # Optional: fall back to scanning the matrix
+    faiss = None
+
+# Optional and not in requirements.txt: int8 scoring is only used when
+# FAISS is not installed
+try:
+    import simsimd
+except ImportError:  # Optional: fall back to a float32 matrix product
+    simsimd = None
+
+# Dynamically quantized (int8) ONNX export of the model, run with ONNX
+# Runtime when optimum[onnxruntime] is installed
+ONNX_MODEL_FILE = 'onnx/model_qint8_avx2.onnx'
+
+# Files the engine keeps in the index directory
+INDEX_FILES = {
+    'embeddings': 'semantic_embeddings.npy',
+    'doc_ids': 'semantic_doc_ids.npy',
+    'metadata': 'semantic_metadata.json',
+    'legacy_metadata': 'semantic_metadata.pkl',
+    'faiss': 'semantic_index.faiss',
+    'embeddings_i8': 'semantic_embeddings_i8.npy',
+}
+
+# Dimension of all-MiniLM-L6-v2 embeddings, used if the model does not
+# report its own
+DEFAULT_EMBEDDING_DIM = 384
+
+# Corpus size from which FAISS uses an approximate HNSW graph index
+HNSW_MIN_DOCS = 100_000
+
+# Documents per model.encode() call when building embeddings, and the
+# batch size the model uses within each call
+ENCODE_CHUNK_SIZE = 16384
+ENCODE_BATCH_SIZE = 256
+
+# Number of query embeddings and result lists kept in the LRU caches
+QUERY_CACHE_SIZE = 512
+RESULTS_CACHE_SIZE = 256
+
+# Recent queries whose results a near-duplicate query may reuse, and the
+# cosine similarity at which two queries count as near-duplicates
+SIMILAR_QUERY_WINDOW = 64
+SIMILAR_QUERY_THRESHOLD = 0.95
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
 class SemanticSearchEngine:
     """
     Semantic search engine using sentence transformers for query understanding.
-    
+
     This class handles:
     - Document embedding generation and storage
     - Query embedding and similarity computation
     - Integration with existing search infrastructure
     """
-    
+
     def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
         """
         Initialize the semantic search engine.
-        
+
         Args:
             model_name: Name of the sentence transformer model to use
         """
@@ -41,218 +95,783 @@ class SemanticSearchEngine:
         self.model = None
         self.doc_embeddings = None
         self.doc_metadata = {}
-        self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
-        
-        # File paths for storing embeddings
-        self.embeddings_file = None
-        self.metadata_file = None
-        
+
+        # Scoring backends built from the embeddings: a FAISS index, or
+        # an int8 copy of the matrix for SIMD scoring
+        self.scoring = SimpleNamespace(faiss_index=None, embeddings_i8=None)
+
+        # File paths for storing embeddings, set by initialize()
+        self.files = None
+
+        # Query caches, keyed by normalized query text
+        self._cache = SimpleNamespace(
+            lock=threading.Lock(),
+            queries=OrderedDict(),  # key -> query embedding
+            results=OrderedDict(),  # (key, top_k) -> results
+            recent=deque(maxlen=SIMILAR_QUERY_WINDOW)
+        )
+
     def initialize(self, index_dir: str):
         """
         Initialize the semantic search engine with the given index directory.
-        
+
         Args:
             index_dir: Directory containing index files
         """
-        self.embeddings_file = os.path.join(index_dir, "semantic_embeddings.npy")
-        self.metadata_file = os.path.join(index_dir, "semantic_metadata.pkl")
-        
-        logger.info(f"Initializing semantic search with model: {self.model_name}")
-        
+        self.files = SimpleNamespace(**{
+            name: os.path.join(index_dir, filename)
+            for name, filename in INDEX_FILES.items()
+        })
+
+        logger.info(
+            f"Initializing semantic search with model: {self.model_name}")
+
         try:
             # Load the sentence transformer model
-            self.model = SentenceTransformer(self.model_name)
+            self.model = self._load_model()
             logger.info("Sentence transformer model loaded successfully")
-            
+
             # Try to load existing embeddings
             self._load_embeddings()
-            
+
         except Exception as e:
             logger.error(f"Error initializing semantic search: {e}")
             # Fallback: semantic search will be disabled
             self.model = None
-    
+
+    def _load_model(self) -> SentenceTransformer:
+        """
+        Load the sentence transformer, preferring the ONNX Runtime backend.
+
+        The int8 ONNX export runs several times faster on CPU than the
+        PyTorch model; PyTorch is used when ONNX Runtime is not installed
+        or the export cannot be loaded.
+
+        Returns:
+            The loaded SentenceTransformer model
+        """
+        if (importlib.util.find_spec('optimum') and
+                importlib.util.find_spec('onnxruntime')):
+            try:
+                model = SentenceTransformer(
+                    self.model_name,
+                    backend='onnx',
+                    model_kwargs={'file_name': ONNX_MODEL_FILE}
+                )
+                logger.info(f"Using ONNX Runtime model: {ONNX_MODEL_FILE}")
+                return model
+            except Exception as e:
+                logger.warning(
+                    f"Could not load ONNX model, using PyTorch: {e}")
+        return SentenceTransformer(self.model_name)
+
     def _load_embeddings(self):
         """Load pre-computed embeddings from disk if available."""
         try:
-            if os.path.exists(self.embeddings_file) and os.path.exists(self.metadata_file):
-                self.doc_embeddings = np.load(self.embeddings_file)
-                with open(self.metadata_file, 'rb') as f:
-                    self.doc_metadata = pickle.load(f)
-                logger.info(f"Loaded {len(self.doc_metadata)} document embeddings")
+            if os.path.exists(self.files.embeddings) and self._load_metadata():
+                # Memory-map the matrix so pages are read in lazily and
+                # shared through the page cache instead of copied into RAM
+                self.doc_embeddings = np.load(self.files.embeddings,
+                                              mmap_mode='r')
+
+                # Embeddings saved before normalization was introduced
+                if not self.doc_metadata.get('normalized'):
+                    self.doc_embeddings = _normalize_rows(self.doc_embeddings)
+                    self.doc_metadata['normalized'] = True
+                # No copy when the file already holds C-contiguous float32
+                self.doc_embeddings = np.ascontiguousarray(
+                    self.doc_embeddings, dtype=np.float32)
+                self._prepare_scoring()
+                logger.info(
+                    f"Loaded {len(self.doc_metadata)} document embeddings")
             else:
-                logger.info("No existing embeddings found, will generate on first use")
+                logger.info("No existing embeddings found, "
+                            "will generate on first use")
         except Exception as e:
             logger.warning(f"Error loading embeddings: {e}")
             self.doc_embeddings = None
+            self.scoring.embeddings_i8 = None
+            self.scoring.faiss_index = None
             self.doc_metadata = {}
-    
-    def _save_embeddings(self):
-        """Save computed embeddings to disk."""
+
+    def _load_metadata(self) -> bool:
+        """
+        Load document metadata saved alongside the embeddings.
+
+        Doc IDs are stored as an int64 .npy array (memory-mapped on load)
+        and the remaining scalar fields as JSON.  Metadata pickled by older
+        versions is still read.
+
+        Returns:
+            True if metadata was found and loaded, False otherwise
+        """
+        if (os.path.exists(self.files.doc_ids) and
+                os.path.exists(self.files.metadata)):
+            with open(self.files.metadata, 'r', encoding='utf-8') as f:
+                self.doc_metadata = json.load(f)
+            self.doc_metadata['doc_ids'] = np.load(self.files.doc_ids,
+                                                   mmap_mode='r')
+            return True
+
+        if os.path.exists(self.files.legacy_metadata):
+            with open(self.files.legacy_metadata, 'rb') as f:
+                self.doc_metadata = pickle.load(f)
+            return True
+
+        return False
+
+    def _save_embeddings(self, save_matrix: bool = True):
+        """
+        Save computed embeddings to disk.
+
+        Args:
+            save_matrix: Write the embedding matrix as well as the metadata;
+                False when the matrix was already written to disk
+        """
         try:
             if self.doc_embeddings is not None and self.doc_metadata:
-                np.save(self.embeddings_file, self.doc_embeddings)
-                with open(self.metadata_file, 'wb') as f:
-                    pickle.dump(self.doc_metadata, f)
-                logger.info(f"Saved {len(self.doc_metadata)} document embeddings")
+                # Write to a temporary file and rename it into place, so a
+                # memory-mapped copy of the old matrix is never truncated
+                if save_matrix:
+                    tmp_file = self.files.embeddings + '.tmp.npy'
+                    np.save(tmp_file, self.doc_embeddings)
+                    os.replace(tmp_file, self.files.embeddings)
+                tmp_file = self.files.doc_ids + '.tmp.npy'
+                np.save(tmp_file, np.asarray(self.doc_metadata['doc_ids'],
+                                             dtype=np.int64))
+                os.replace(tmp_file, self.files.doc_ids)
+                with open(self.files.metadata, 'w', encoding='utf-8') as f:
+                    json.dump({key: value
+                               for key, value in self.doc_metadata.items()
+                               if key != 'doc_ids'}, f)
+                logger.info(
+                    f"Saved {len(self.doc_metadata)} document embeddings")
         except Exception as e:
             logger.error(f"Error saving embeddings: {e}")
-    
+
+    def _prepare_scoring(self, rebuild: bool = False):
+        """
+        Set up the fastest available backend for scoring queries.
+
+        FAISS is preferred, then int8 scoring with simsimd; without either,
+        queries are scored with a float32 matrix product.  The FAISS index
+        and the int8 matrix are saved next to the embeddings and loaded
+        from there, memory-mapped where possible, so they are built once
+        rather than on every start.
+
+        Args:
+            rebuild: Rebuild the FAISS index or int8 matrix even if a saved
+                one exists
+        """
+        self.scoring.faiss_index = None
+        self.scoring.embeddings_i8 = None
+        self.clear_cache()
+        if self.doc_embeddings is None:
+            return
+
+        if faiss is not None:
+            if not rebuild:
+                self.scoring.faiss_index = self._read_faiss_index()
+            if self.scoring.faiss_index is None:
+                self.scoring.faiss_index = self._write_faiss_index(
+                    _build_faiss_index(self.doc_embeddings))
+        elif simsimd is not None:
+            if not rebuild:
+                self.scoring.embeddings_i8 = self._read_int8_embeddings()
+            if self.scoring.embeddings_i8 is None:
+                self.scoring.embeddings_i8 = self._write_int8_embeddings(
+                    _quantize_rows(self.doc_embeddings))
+
+    def _is_current(self, path: str) -> bool:
+        """Check that a derived file exists and postdates the embeddings."""
+        return (os.path.exists(path) and
+                os.path.getmtime(path) >=
+                os.path.getmtime(self.files.embeddings))
+
+    def _read_faiss_index(self):
+        """Read the saved FAISS index if it matches the embeddings."""
+        if not self._is_current(self.files.faiss):
+            return None
+        try:
+            index = _mmap_faiss_index(self.files.faiss)
+            if index is None:
+                index = faiss.read_index(self.files.faiss)
+        except Exception as e:
+            logger.warning(f"Error loading FAISS index: {e}")
+            return None
+        if (index.ntotal != self.doc_embeddings.shape[0] or
+                index.d != self.doc_embeddings.shape[1]):
+            return None
+        return index
+
+    def _write_faiss_index(self, index):
+        """
+        Save a newly built FAISS index and reopen it memory-mapped.
+
+        Args:
+            index: FAISS index built in memory
+
+        Returns:
+            The memory-mapped index, or the in-memory one if it could not
+            be saved or mapped
+        """
+        try:
+            # Rename into place so a mapped copy of the old index is never
+            # truncated
+            tmp_file = self.files.faiss + '.tmp'
+            faiss.write_index(index, tmp_file)
+            os.replace(tmp_file, self.files.faiss)
+        except Exception as e:
+            logger.warning(f"Error saving FAISS index: {e}")
+            return index
+        mapped = _mmap_faiss_index(self.files.faiss)
+        return index if mapped is None else mapped
+
+    def _read_int8_embeddings(self):
+        """Memory-map the saved int8 matrix if it matches the embeddings."""
+        if not self._is_current(self.files.embeddings_i8):
+            return None
+        try:
+            embeddings_i8 = np.load(self.files.embeddings_i8, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Error loading int8 embeddings: {e}")
+            return None
+        if (embeddings_i8.dtype != np.int8 or
+                embeddings_i8.shape != self.doc_embeddings.shape):
+            return None
+        return embeddings_i8
+
+    def _write_int8_embeddings(self, embeddings_i8: np.ndarray) -> np.ndarray:
+        """
+        Save a newly quantized int8 matrix and reopen it memory-mapped.
+
+        Args:
+            embeddings_i8: int8 matrix quantized in memory
+
+        Returns:
+            The memory-mapped matrix, or the in-memory one if it could not
+            be saved
+        """
+        try:
+            tmp_file = self.files.embeddings_i8 + '.tmp.npy'
+            np.save(tmp_file, embeddings_i8)
+            os.replace(tmp_file, self.files.embeddings_i8)
+            return np.load(self.files.embeddings_i8, mmap_mode='r')
+        except Exception as e:
+            logger.warning(f"Error saving int8 embeddings: {e}")
+            return embeddings_i8
+
     def build_document_embeddings(self, db_path: str):
         """
         Build semantic embeddings for all documents in the database.
-        
+
+        A background thread reads documents from the database in chunks
+        while the model encodes the previous chunk, and embeddings are
+        written straight into a memory-mapped matrix on disk, so neither
+        the documents nor the matrix need to fit in memory.
+
         Args:
             db_path: Path to the SQLite database containing document metadata
         """
         if not self.model:
             logger.warning("Semantic search not available: model not loaded")
             return
-            
+
         logger.info("Building document embeddings...")
-        
+
+        build_file = self.files.embeddings + '.build.npy'
+        chunks = queue.Queue(maxsize=2)
+        stop = threading.Event()
+        reader = None
         try:
-            # Connect to database and fetch all documents
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT docid, title, summary FROM documents")
-            documents = cursor.fetchall()
-            conn.close()
-            
-            if not documents:
+            total_docs = _count_documents(db_path)
+            if not total_docs:
                 logger.warning("No documents found in database")
                 return
-            
-            # Prepare texts for embedding
-            doc_texts = []
-            doc_ids = []
-            
-            for docid, title, summary in documents:
-                # Combine title and summary for richer semantic content
-                text = f"{title or ''} {summary or ''}".strip()
-                if text:  # Only include documents with meaningful text
-                    doc_texts.append(text)
-                    doc_ids.append(docid)
-            
-            if not doc_texts:
+
+            reader = threading.Thread(
+                target=_read_documents, args=(db_path, chunks, stop),
+                name="embedding-reader", daemon=True
+            )
+            reader.start()
+
+            doc_ids = self._encode_documents(chunks, build_file, total_docs)
+            if not doc_ids:
                 logger.warning("No meaningful text found in documents")
                 return
-            
-            # Generate embeddings in batches for memory efficiency
-            batch_size = 32
-            embeddings = []
-            
-            for i in range(0, len(doc_texts), batch_size):
-                batch_texts = doc_texts[i:i + batch_size]
-                batch_embeddings = self.model.encode(batch_texts, convert_to_numpy=True)
-                embeddings.append(batch_embeddings)
-                
-                if i % (batch_size * 10) == 0:
-                    logger.info(f"Processed {i + len(batch_texts)}/{len(doc_texts)} documents")
-            
-            # Combine all embeddings
-            self.doc_embeddings = np.vstack(embeddings)
-            
-            # Store metadata mapping
-            self.doc_metadata = {
-                'doc_ids': doc_ids,
-                'model_name': self.model_name,
-                'embedding_dim': self.embedding_dim,
-                'total_docs': len(doc_ids)
-            }
-            
-            # Save to disk
-            self._save_embeddings()
-            
-            logger.info(f"Successfully built embeddings for {len(doc_ids)} documents")
-            
+
+            self._persist_embeddings(build_file, doc_ids, total_docs)
+            logger.info(
+                f"Successfully built embeddings for {len(doc_ids)} documents")
+
         except Exception as e:
             logger.error(f"Error building document embeddings: {e}")
-    
-    def semantic_search(self, query: str, top_k: int = 100) -> List[Dict[str, Any]]:
+        finally:
+            # Stop the reader if encoding ended early, and drop the
+            # partially written matrix
+            _stop_reader(reader, chunks, stop)
+            if os.path.exists(build_file):
+                os.remove(build_file)
+
+    def _encode_documents(self, chunks: queue.Queue, build_file: str,
+                          total_docs: int) -> List[int]:
+        """
+        Encode document chunks from the reader into a matrix on disk.
+
+        Args:
+            chunks: Queue the reader thread puts document chunks on
+            build_file: Path of the memory-mapped matrix to write
+            total_docs: Number of documents, an upper bound on the rows
+
+        Returns:
+            IDs of the encoded documents, in row order
+        """
+        # Encode in large chunks written straight into one preallocated
+        # matrix, instead of stacking many small batches.  Each encode
+        # call batches internally on the model's device (the GPU when
+        # available) and returns L2-normalized embeddings, so a query's
+        # cosine similarities reduce to a single matrix-vector product
+        embedding_dim = (self.model.get_sentence_embedding_dimension()
+                         or DEFAULT_EMBEDDING_DIM)
+        embeddings = np.lib.format.open_memmap(
+            build_file, mode='w+', dtype=np.float32,
+            shape=(total_docs, embedding_dim)
+        )
+        doc_ids = []
+
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            chunk_ids, chunk_texts = chunk
+            start = len(doc_ids)
+            embeddings[start:start + len(chunk_texts)] = self.model.encode(
+                chunk_texts,
+                batch_size=ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            doc_ids.extend(chunk_ids)
+            logger.info(f"Processed {len(doc_ids)}/{total_docs} documents")
+
+        embeddings.flush()
+        return doc_ids
+
+    def _persist_embeddings(self, build_file: str, doc_ids: List[int],
+                            total_docs: int):
+        """
+        Move a built matrix into place and save its metadata.
+
+        Args:
+            build_file: Path of the matrix written by _encode_documents
+            doc_ids: IDs of the encoded documents, in row order
+            total_docs: Number of rows allocated in the matrix
+        """
+        # Rename the matrix into place; documents without text leave
+        # unused rows at the end, in which case the used rows are copied
+        if len(doc_ids) < total_docs:
+            tmp_file = self.files.embeddings + '.tmp.npy'
+            np.save(tmp_file,
+                    np.load(build_file, mmap_mode='r')[:len(doc_ids)])
+            os.replace(tmp_file, self.files.embeddings)
+        else:
+            os.replace(build_file, self.files.embeddings)
+
+        self.doc_embeddings = np.load(self.files.embeddings, mmap_mode='r')
+        self._prepare_scoring(rebuild=True)
+
+        # Store metadata mapping
+        self.doc_metadata = {
+            'doc_ids': doc_ids,
+            'model_name': self.model_name,
+            'embedding_dim': self.doc_embeddings.shape[1],
+            'total_docs': len(doc_ids),
+            'normalized': True
+        }
+
+        # Save the metadata to disk
+        self._save_embeddings(save_matrix=False)
+
+    def semantic_search(self, query: str,
+                        top_k: int = 100) -> List[Dict[str, Any]]:
         """
         Perform semantic search for the given query.
-        
+
+        Results are cached by normalized query text, and a query whose
+        embedding nearly matches a recent query's reuses its results.
+
         Args:
             query: Search query string
             top_k: Number of top results to return
-            
+
         Returns:
-            List of dictionaries with docid and semantic_score
+            List of dictionaries with int docid and semantic_score
         """
         if not self.model or self.doc_embeddings is None:
             logger.warning("Semantic search not available")
             return []
-        
+
+        key = _normalize_query(query)
+        with self._cache.lock:
+            cached = self._cache.results.get((key, top_k))
+            if cached is not None:
+                self._cache.results.move_to_end((key, top_k))
+                return list(cached)
+
         try:
-            # Generate query embedding
-            query_embedding = self.model.encode([query], convert_to_numpy=True)
-            
-            # Compute cosine similarities
-            similarities = cosine_similarity(query_embedding, self.doc_embeddings)[0]
-            
-            # Get top-k results
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            
-            results = []
-            for idx in top_indices:
-                if similarities[idx] > 0.1:  # Filter out very low similarity scores
-                    docid = self.doc_metadata['doc_ids'][idx]
-                    results.append({
-                        'docid': docid,
-                        'semantic_score': float(similarities[idx])
-                    })
-            
-            logger.info(f"Semantic search returned {len(results)} results for query: '{query}'")
-            return results
-            
+            query_embedding = self._encode_query(query, key)
+
+            # Reuse the results of a recent near-duplicate query
+            results = self._similar_results(query_embedding, top_k)
+            if results is None:
+                results = self._search_embedding(query_embedding, top_k)
+                logger.info(f"Semantic search returned {len(results)} "
+                            f"results for query: '{query}'")
+
+            with self._cache.lock:
+                self._cache.results[(key, top_k)] = results
+                if len(self._cache.results) > RESULTS_CACHE_SIZE:
+                    self._cache.results.popitem(last=False)
+                self._cache.recent.append((query_embedding, top_k, results))
+            return list(results)
+
         except Exception as e:
             logger.error(f"Error in semantic search: {e}")
             return []
-    
+
+    def _encode_query(self, query: str, key: str) -> np.ndarray:
+        """
+        Return the normalized embedding of a query, encoding it on a miss.
+
+        Args:
+            query: Search query string
+            key: Normalized query text used as the cache key
+
+        Returns:
+            Normalized float32 query embedding
+        """
+        with self._cache.lock:
+            query_embedding = self._cache.queries.get(key)
+            if query_embedding is not None:
+                self._cache.queries.move_to_end(key)
+                return query_embedding
+
+        query_embedding = self.model.encode(
+            [query], convert_to_numpy=True, normalize_embeddings=True
+        )[0].astype(np.float32)
+
+        with self._cache.lock:
+            self._cache.queries[key] = query_embedding
+            if len(self._cache.queries) > QUERY_CACHE_SIZE:
+                self._cache.queries.popitem(last=False)
+        return query_embedding
+
+    def _similar_results(self, query_embedding: np.ndarray,
+                         top_k: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find cached results of a recent query close to this one.
+
+        Args:
+            query_embedding: Normalized float32 query embedding
+            top_k: Number of top results requested
+
+        Returns:
+            The cached results, or None if no recent query is similar enough
+        """
+        with self._cache.lock:
+            recent = [entry for entry in self._cache.recent
+                      if entry[1] == top_k]
+        if not recent:
+            return None
+
+        embeddings = np.stack([entry[0] for entry in recent])
+        similarities = embeddings @ query_embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < SIMILAR_QUERY_THRESHOLD:
+            return None
+        return recent[best][2]
+
+    def _search_embedding(self, query_embedding: np.ndarray,
+                          top_k: int) -> List[Dict[str, Any]]:
+        """
+        Find the documents most similar to a query embedding.
+
+        Args:
+            query_embedding: Normalized float32 query embedding
+            top_k: Number of top results to return
+
+        Returns:
+            List of dictionaries with int docid and semantic_score
+        """
+        if self.scoring.faiss_index is not None:
+            # FAISS returns the top-k sorted by descending similarity
+            scores, indices = self.scoring.faiss_index.search(
+                query_embedding[None, :], top_k
+            )
+            keep = (indices[0] >= 0) & (scores[0] > 0.1)
+            candidates = indices[0][keep]
+            top_scores = scores[0][keep]
+        else:
+            candidates, top_scores = self._scan_top_k(query_embedding, top_k)
+
+        doc_ids = self.doc_metadata['doc_ids']
+        return [
+            {
+                'docid': int(doc_ids[idx]),
+                'semantic_score': score
+            }
+            for idx, score in zip(candidates.tolist(), top_scores.tolist())
+        ]
+
+    def clear_cache(self):
+        """Drop cached query embeddings and results."""
+        with self._cache.lock:
+            self._cache.queries.clear()
+            self._cache.results.clear()
+            self._cache.recent.clear()
+
+    def _scan_top_k(self, query_embedding: np.ndarray,
+                    top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every document against the query and select the top-k.
+
+        Args:
+            query_embedding: Normalized float32 query embedding
+            top_k: Number of top results to return
+
+        Returns:
+            Tuple of (row indices, similarities) sorted by descending
+            similarity, excluding similarities of 0.1 or below
+        """
+        if self.scoring.embeddings_i8 is not None:
+            # Cosine similarities over int8 vectors with a SIMD kernel,
+            # reading a quarter of the bytes of the float32 matrix
+            query_i8 = _quantize_rows(query_embedding[None, :])
+            distances = simsimd.cdist(
+                query_i8, self.scoring.embeddings_i8, metric='cosine'
+            )
+            similarities = 1.0 - np.asarray(distances, dtype=np.float32)[0]
+        else:
+            # Cosine similarities against the pre-normalized document matrix
+            similarities = self.doc_embeddings @ query_embedding
+
+        # Filter out very low similarity scores, then select the top-k
+        # in linear time and sort only those
+        candidates = np.flatnonzero(similarities > 0.1)
+        if top_k < candidates.size:
+            part = np.argpartition(similarities[candidates], -top_k)
+            candidates = candidates[part[candidates.size - top_k:]]
+        top_scores = similarities[candidates]
+        order = np.argsort(-top_scores, kind='stable')
+        return candidates[order], top_scores[order]
+
     def is_available(self) -> bool:
         """
         Check if semantic search is available.
-        
+
         Returns:
             True if semantic search is ready to use, False otherwise
         """
-        return (self.model is not None and 
-                self.doc_embeddings is not None and 
+        return (self.model is not None and
+                self.doc_embeddings is not None and
                 len(self.doc_metadata) > 0)
 
+
+def _count_documents(db_path: str) -> int:
+    """
+    Count the documents in the database.
+
+    Args:
+        db_path: Path to the SQLite database containing document metadata
+
+    Returns:
+        Number of rows in the documents table
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _read_documents(db_path: str, chunks: queue.Queue,
+                    stop: threading.Event):
+    """
+    Read documents to embed, putting them on a queue in chunks.
+
+    Runs on a background thread with its own database connection.  Each
+    chunk is a (doc_ids, texts) tuple of at most ENCODE_CHUNK_SIZE documents
+    with meaningful text; None marks the end, and an exception is passed
+    on for the consumer to raise.
+
+    Args:
+        db_path: Path to the SQLite database containing document metadata
+        chunks: Queue receiving the chunks
+        stop: Event set by the consumer to stop reading early
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.execute(
+                "SELECT docid, title, summary FROM documents")
+            while not stop.is_set():
+                rows = cursor.fetchmany(ENCODE_CHUNK_SIZE)
+                if not rows:
+                    break
+                doc_ids = []
+                doc_texts = []
+                for docid, title, summary in rows:
+                    # Combine title and summary for richer semantic content
+                    text = f"{title or ''} {summary or ''}".strip()
+                    if text:  # Only include documents with meaningful text
+                        doc_ids.append(docid)
+                        doc_texts.append(text)
+                if doc_texts:
+                    chunks.put((doc_ids, doc_texts))
+        finally:
+            conn.close()
+        chunks.put(None)
+    except Exception as e:
+        chunks.put(e)
+
+
+def _stop_reader(reader: Optional[threading.Thread], chunks: queue.Queue,
+                 stop: threading.Event):
+    """
+    Stop the document reader thread and wait for it to exit.
+
+    Args:
+        reader: The reader thread, or None if it was never started
+        chunks: Queue the reader puts chunks on, drained so it never blocks
+        stop: Event that tells the reader to stop reading
+    """
+    stop.set()
+    if reader is not None:
+        while reader.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _normalize_query(query: str) -> str:
+    """Normalize query text for use as a cache key."""
+    return " ".join(query.casefold().split())
+
+
+def _normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row of an embedding matrix.
+
+    Args:
+        embeddings: Matrix with one embedding per row
+
+    Returns:
+        C-contiguous float32 matrix of unit-length rows (zero rows stay zero)
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    normalized = embeddings / np.maximum(norms, 1e-12)
+    return np.ascontiguousarray(normalized, dtype=np.float32)
+
+
+def _quantize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Quantize each row of an embedding matrix to int8.
+
+    Every row is scaled by its own maximum magnitude so it uses the full
+    int8 range.  Scales are not kept: cosine similarity is unaffected by
+    scaling a row.
+
+    Args:
+        embeddings: Matrix with one embedding per row
+
+    Returns:
+        C-contiguous int8 matrix of the same shape
+    """
+    scales = np.max(np.abs(embeddings), axis=1, keepdims=True) / 127.0
+    quantized = np.round(embeddings / np.maximum(scales, 1e-12))
+    return np.ascontiguousarray(np.clip(quantized, -127, 127), dtype=np.int8)
+
+
+def _mmap_faiss_index(path: str):
+    """
+    Read a saved FAISS index with IO_FLAG_MMAP.
+
+    FAISS maps the index data only for index types and releases that
+    support it, and may reject the flag otherwise.
+
+    Args:
+        path: Path of the saved index
+
+    Returns:
+        The index, or None if it cannot be read this way
+    """
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+    except RuntimeError as e:
+        logger.info(f"FAISS index {path} cannot be memory-mapped: {e}")
+        return None
+
+
+def _build_faiss_index(embeddings: np.ndarray):
+    """
+    Build a FAISS inner-product index over normalized embeddings.
+
+    Small corpora use an exact flat index; large ones an HNSW graph,
+    which searches a small candidate set instead of every document.
+
+    Args:
+        embeddings: C-contiguous float32 matrix of unit-length rows
+
+    Returns:
+        FAISS index whose inner products are cosine similarities
+    """
+    num_docs, dim = embeddings.shape
+    if num_docs >= HNSW_MIN_DOCS:
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexFlatIP(dim)
+    index.add(embeddings)
+    return index
+
+
 # Global instance for the semantic search engine
 semantic_engine = SemanticSearchEngine()
 
+
 def initialize_semantic_search(index_dir: str, db_path: str = None):
     """
     Initialize semantic search functionality.
-    
+
     Args:
         index_dir: Directory containing index files
         db_path: Path to SQLite database (optional, for building embeddings)
     """
     semantic_engine.initialize(index_dir)
-    
+
     # Build embeddings if database path is provided and embeddings don't exist
-    if (db_path and os.path.exists(db_path) and 
-        not semantic_engine.is_available()):
+    if (db_path and os.path.exists(db_path) and
+            not semantic_engine.is_available()):
         semantic_engine.build_document_embeddings(db_path)
 
+
 def get_semantic_results(query: str, top_k: int = 100) -> List[Dict[str, Any]]:
     """
     Get semantic search results for a query.
-    
+
     Args:
         query: Search query string
         top_k: Number of top results to return
-        
+
     Returns:
         List of semantic search results
     """
     return semantic_engine.semantic_search(query, top_k)
 
+
 def is_semantic_available() -> bool:
     """Check if semantic search is available."""
     return semantic_engine.is_available()
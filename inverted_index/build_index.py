@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Fused Inverted Index Builder.
+
+This program does the work of MapReduce jobs 2-5 (term frequencies, IDF,
+document normalization and segmentation) in a single process, keeping the
+intermediate data in memory instead of writing it to disk between jobs.
+It is meant for corpora whose postings fit in memory; the MapReduce jobs
+remain the way to build larger indexes.  The segment files it writes
+match those of the MapReduce pipeline.
+
+Usage: cat output1/part-* | ./map2.py | ./build_index.py output
+
+Input: Key: term, Value: document ID (the output of map2.py)
+Output: Inverted index segments output/part-00000, part-00001, ... with
+lines formatted as "term idf docid1 tf1 norm1 docid2 tf2 norm2 ..."
+"""
+import math
+import pathlib
+import sys
+from collections import Counter, defaultdict
+
+# Documents are distributed across segments by docid % NUM_SEGMENTS
+NUM_SEGMENTS = 3
+
+
+def count_terms(lines):
+    """Count the occurrences of each (term, docid) pair, as in job 2."""
+    counts = Counter()
+    for line in lines:
+        term, _, docid = line.rstrip("\n").partition("\t")
+        if term:
+            counts[term, docid] += 1
+    return counts
+
+
+def group_postings(counts):
+    """Group term frequencies by term as {term: [(docid, tf_str), ...]}."""
+    postings = defaultdict(list)
+    for (term, docid), count in counts.items():
+        postings[term].append((docid, str(count)))
+    return postings
+
+
+def compute_idf(postings, total_docs):
+    """Compute the IDF string of every term, as in job 3."""
+    return {
+        term: str(math.log10(total_docs / len(term_postings)))
+        for term, term_postings in postings.items()
+    }
+
+
+def compute_norms(postings, idf):
+    """
+    Compute the normalization factor string of every document, as in job 4.
+
+    Squared weights are formatted and summed in the same order as the
+    MapReduce job, which sorts them as strings, so the sums match exactly.
+    """
+    squares = defaultdict(list)
+    for term, term_postings in postings.items():
+        term_idf = float(idf[term])
+        for docid, tf_s in term_postings:
+            weight = float(tf_s) * term_idf
+            squares[docid].append(str(weight * weight))
+
+    norms = {}
+    for docid, doc_squares in squares.items():
+        doc_squares.sort()
+        norm_sum = 0.0
+        for square in doc_squares:
+            norm_sum += float(square)
+        norms[docid] = str(math.sqrt(norm_sum))
+    return norms
+
+
+def format_segments(postings, idf, norms):
+    """
+    Format the inverted index lines of each segment, as in job 5.
+
+    Terms are sorted, and each term's postings are sorted by docid string,
+    matching the order of the MapReduce job's sorted reducer input.
+    """
+    segments = [[] for _ in range(NUM_SEGMENTS)]
+    for term in sorted(postings):
+        segment_postings = defaultdict(list)
+        for docid, tf_s in sorted(postings[term]):
+            segment_postings[int(docid) % NUM_SEGMENTS].append(
+                f"{docid} {tf_s} {norms[docid]}"
+            )
+        for seg, hits in segment_postings.items():
+            segments[seg].append(f"{term} {idf[term]} {' '.join(hits)}\n")
+    return segments
+
+
+def write_segments(segments, output_dir):
+    """
+    Write non-empty segments to part files in output_dir.
+
+    Like madoop, which drops empty partitions, part files are numbered
+    consecutively over the segments that have postings.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    non_empty = [lines for lines in segments if lines]
+    for i, lines in enumerate(non_empty):
+        part_path = output_dir/f"part-{i:05d}"
+        with part_path.open("w", encoding="utf-8") as part_file:
+            part_file.write("".join(lines))
+
+
+def main():
+    """Build the inverted index from map2 output on stdin."""
+    if len(sys.argv) != 2:
+        sys.exit(f"Usage: {sys.argv[0]} OUTPUT_DIR")
+
+    # Grab N = total number of documents
+    with open("total_document_count.txt", "r", encoding="utf-8") as f:
+        total_docs = int(f.read().strip())
+
+    postings = group_postings(count_terms(sys.stdin))
+    idf = compute_idf(postings, total_docs)
+    norms = compute_norms(postings, idf)
+    write_segments(
+        format_segments(postings, idf, norms), pathlib.Path(sys.argv[1])
+    )
+
+
+if __name__ == "__main__":
+    main()
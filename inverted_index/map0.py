@@ -15,4 +15,4 @@ for line in sys.stdin:
     # Case‑insensitive match for the DOCTYPE declaration
     if "<!doctype html" in line.lower():
         # Emit 1 for each document found
-        print("1")
+        sys.stdout.write("1\n")
@@ -3,33 +3,41 @@
 MapReduce Job 1: HTML Document Parser.
 
 This mapper extracts document ID and content from HTML documents.
-It uses BeautifulSoup to parse HTML and extract text content.
+It uses BeautifulSoup to parse HTML and extract text content, with the
+C-based lxml parser when it is installed.
 
 Input: Raw HTML documents
 Output: Key: document ID, Value: document text content
 """
+import importlib.util
 import sys
 import bs4
 
+# lxml parses several times faster than the pure-Python html.parser.
+# Text is still extracted with get_text(), so the rules (e.g. skipping
+# script and style contents) stay the same with either parser.
+PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
 # Parse one HTML document at a time.  Note that this is still O(1) memory
-# WRT the number of documents in the dataset.
-HTML = ""
+# WRT the number of documents in the dataset.  Lines are collected in a
+# list and joined once per document rather than appended to a string.
+html_lines = []
 for line in sys.stdin:
     # Assume well-formed HTML docs:
     # - Starts with <!DOCTYPE html>
     # - End with </html>
     # - Contains a trailing newline
     if "<!DOCTYPE html>" in line:
-        HTML = line
+        html_lines = [line]
     else:
-        HTML += line
+        html_lines.append(line)
 
     # If we're at the end of a document, parse
     if "</html>" not in line:
         continue
 
     # Configure Beautiful Soup parser
-    soup = bs4.BeautifulSoup(HTML, "html.parser")
+    soup = bs4.BeautifulSoup("".join(html_lines), PARSER)
 
     # Get docid from document
     doc_id_element = soup.find("meta", attrs={"eecs485_docid": True})
@@ -46,4 +54,4 @@ for line in sys.stdin:
     # Remove extra newlines
     content = content.replace("\n", "")
 
-    print(f"{doc_id}\t{content}")
+    sys.stdout.write(f"{doc_id}\t{content}\n")
@@ -8,12 +8,18 @@ removing stopwords, and emitting term-document pairs.
 Input: Key: document ID, Value: document text content
 Output: Key: term, Value: document ID
 """
+import string
 import sys
-import re
+from itertools import filterfalse
+
+# ASCII bytes removed from casefolded text before splitting into terms;
+# everything except lowercase letters, digits and spaces
+KEEP = (string.ascii_lowercase + string.digits + " ").encode("ascii")
+DELETE = bytes(c for c in range(128) if c not in KEEP)
 
 # load stopwords into a set
 with open("stopwords.txt", "r", encoding="utf-8") as stopwords_file:
-    stop = set(w.strip() for w in stopwords_file)
+    STOPWORDS = frozenset(w.strip() for w in stopwords_file)
 
 for line in sys.stdin:
     line = line.rstrip("\n")
@@ -21,10 +27,19 @@ for line in sys.stdin:
         continue
     docid, content = line.split("\t", 1)
 
-    # lowercase and strip non-alphanumeric (but keep digits)
-    text = content.casefold()
-    text = re.sub(r"[^a-z0-9 ]+", "", text)
+    # lowercase and strip non-alphanumeric (but keep digits).  Encoding
+    # drops non-ASCII characters and translate drops the rest, both in C.
+    text = (
+        content.casefold()
+        .encode("ascii", "ignore")
+        .translate(None, DELETE)
+        .decode("ascii")
+    )
 
-    for term in text.split():
-        if term and term not in stop:
-            print(f"{term}\t{docid}")
+    # Filter stopwords and format every "term\tdocid" line with C-level
+    # builtins (filterfalse, str.join) instead of a per-term Python loop,
+    # then emit the document's terms with a single write
+    terms = list(filterfalse(STOPWORDS.__contains__, text.split()))
+    if terms:
+        suffix = f"\t{docid}\n"
+        sys.stdout.write(suffix.join(terms) + suffix)
@@ -16,10 +16,8 @@ for line in sys.stdin:
     line = line.strip()
     if not line:
         continue
-    term, rest = line.split("\t", 1)
-    docid, tf = rest.split()
+    term, _, rest = line.partition("\t")
+    docid, _, tf = rest.partition("\t")
 
-    # count one DF
-    print(f"{term}\tDF\t1")
-    # carry the posting
-    print(f"{term}\tPOST\t{docid}\t{tf}")
+    # count one DF and carry the posting
+    sys.stdout.write(f"{term}\tDF\t1\n{term}\tPOST\t{docid}\t{tf}\n")
@@ -15,12 +15,8 @@ import sys
 for line in sys.stdin:
     line = line.strip()
 
-    # Split the line once and extract each component by index
-    parts = line.split("\t")
-    term = parts[0]
-    docid = parts[1]
-    tf_s = parts[2]
-    idf_s = parts[3]
+    # Split the line once and unpack each component
+    term, docid, tf_s, idf_s = line.split("\t")
 
     # Convert to float for calculation
     tf = float(tf_s)
@@ -28,7 +24,8 @@ for line in sys.stdin:
     w = tf * idf
     sq = w*w
 
-    # tag the square for norm calculation
-    print(f"{docid}\tNORM\t{sq}")
-    # carry the full posting forward
-    print(f"{docid}\tPOST\t{term}\t{tf_s}\t{idf_s}")
+    # tag the square for norm calculation and carry the full posting forward
+    sys.stdout.write(
+        f"{docid}\tNORM\t{sq}\n"
+        f"{docid}\tPOST\t{term}\t{tf_s}\t{idf_s}\n"
+    )
@@ -15,4 +15,4 @@ for line in sys.stdin:
     term, docid, tf_s, idf_s, norm_s = line.strip().split("\t")
     seg = int(docid) % 3
     # prefix with segment, then a tab, then the final posting
-    print(f"{seg}\t{term} {idf_s} {docid} {tf_s} {norm_s}")
+    sys.stdout.write(f"{seg}\t{term} {idf_s} {docid} {tf_s} {norm_s}\n")
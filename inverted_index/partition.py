@@ -11,8 +11,11 @@ Output: The segment number as an integer
 """
 import sys
 
-for line in sys.stdin:
+# Work on raw bytes: the key is copied through as-is, with no decoding,
+# int parsing or formatting per line
+out = sys.stdout.buffer
+for line in sys.stdin.buffer:
     # map5.py outputs:  <segment>\t<term> <idf> <docid> <tf> <norm>
     # so the partition key is the integer before the tab
-    key, _, _ = line.partition("\t")
-    print(int(key))
+    key, _, _ = line.partition(b"\t")
+    out.write(key + b"\n")
@@ -4,6 +4,10 @@ set -Eeuo pipefail
 # ─── CONFIGURATION ────────────────────────────────────────────────────────────
 INPUT_DIR=${1:-crawl}
 
+# Set FUSED=1 to replace jobs 2-5 with build_index.py, which builds the
+# index in a single process.  Only for corpora whose postings fit in memory.
+FUSED=${FUSED:-0}
+
 DOC_COUNT_DIR=output0
 PARSE_DIR=output1
 TF_DIR=output2
@@ -31,6 +35,10 @@ madoop \
   -mapper  ./map1.py \
   -reducer ./reduce1.py
 
+if [ "$FUSED" = 1 ]; then
+# ─── JOBS 2-5 FUSED: IN-MEMORY INDEX BUILD ─────────────────────────────────────
+cat "$PARSE_DIR"/part-* | ./map2.py | ./build_index.py "$INDEX_DIR"
+else
 # ─── JOB 2: TERM FREQUENCIES ───────────────────────────────────────────────────
 madoop \
   -input   "$PARSE_DIR" \
@@ -59,6 +67,7 @@ madoop \
   -reducer     ./reduce5.py \
   -partitioner ./partition.py \
   -numReduceTasks 3
+fi
 
 # ─── COPY INTO index_server FOR TESTS ──────────────────────────────────────────
 TARGET=../index_server/index/inverted_index
@@ -15,4 +15,4 @@ for line in sys.stdin:
     # each line is a “1”
     TOTAL_DOCS += int(line.strip())
 # output the single integer
-print(TOTAL_DOCS)
+sys.stdout.write(f"{TOTAL_DOCS}\n")
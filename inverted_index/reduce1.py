@@ -13,14 +13,14 @@ import sys
 CURRENT_DOC = None
 current_content = []
 for line in sys.stdin:
-    doc_id, content = line.rstrip("\n").split("\t", 1)
+    doc_id, _, content = line.rstrip("\n").partition("\t")
     # If we've moved to a new doc_id, emit the previous one
     if doc_id != CURRENT_DOC and CURRENT_DOC is not None:
-        print(f"{CURRENT_DOC}\t{' '.join(current_content)}")
+        sys.stdout.write(f"{CURRENT_DOC}\t{' '.join(current_content)}\n")
         current_content = []
     CURRENT_DOC = doc_id
     current_content.append(content)
 # emit the last doc
 if CURRENT_DOC is not None:
     FULL_TEXT = " ".join(current_content)
-    print(f"{CURRENT_DOC}\t{FULL_TEXT}")
+    sys.stdout.write(f"{CURRENT_DOC}\t{FULL_TEXT}\n")
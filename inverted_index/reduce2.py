@@ -25,7 +25,7 @@ def flush():
 
     current_term, current_docid = CURRENT_TERM
     # Emit the raw count (not 1 + log10(count))
-    print(f"{current_term}\t{current_docid}\t{COUNT}")
+    sys.stdout.write(f"{current_term}\t{current_docid}\t{COUNT}\n")
 
 
 for line in sys.stdin:
@@ -32,23 +32,29 @@ def flush():
         return
     idf = math.log10(N/DF) if DF else 0.0
 
-    for current_docid, current_tf in postings:
-        # emit term\tdocid\ttf\tidf
-        print(f"{CURRENT}\t{current_docid}\t{current_tf}\t{idf}")
+    # Format the term and IDF once, not once per posting
+    prefix = f"{CURRENT}\t"
+    suffix = f"\t{idf}\n"
+
+    # emit term\tdocid\ttf\tidf for every posting with a single write
+    sys.stdout.write("".join([
+        f"{prefix}{current_docid}\t{current_tf}{suffix}"
+        for current_docid, current_tf in postings
+    ]))
 
 
 for line in sys.stdin:
-    parts = line.rstrip("\n").split("\t")
-    term, tag = parts[0], parts[1]
+    term, _, rest = line.rstrip("\n").partition("\t")
+    tag, _, rest = rest.partition("\t")
     if CURRENT and term != CURRENT:
         flush()
         DF = 0
         postings = []
     CURRENT = term
     if tag == "DF":
-        DF += int(parts[2])
+        DF += int(rest)
     else:  # POST
-        docid, tf = parts[2], parts[3]
+        docid, _, tf = rest.partition("\t")
         postings.append((docid, tf))
 
 flush()
@@ -30,15 +30,16 @@ def flush():
     if CURRENT_DOC is None:
         return
 
-    # compute the normalization factor
-    norm = math.sqrt(NORM_SUM)
+    # compute the normalization factor, formatted once for all postings
+    norm_s = str(math.sqrt(NORM_SUM))
 
-    # emit one line per term: term \t docid \t tf \t idf \t norm
-    for posting_term, posting_tf, posting_idf in POSTINGS:
-        print(
-            f"{posting_term}\t{CURRENT_DOC}\t{posting_tf}\t"
-            f"{posting_idf}\t{norm}"
-        )
+    # emit one line per term: term \t docid \t tf \t idf \t norm,
+    # all with a single write
+    sys.stdout.write("".join([
+        f"{posting_term}\t{CURRENT_DOC}\t{posting_tf}\t"
+        f"{posting_idf}\t{norm_s}\n"
+        for posting_term, posting_tf, posting_idf in POSTINGS
+    ]))
 
 
 for line in sys.stdin:
@@ -12,37 +12,31 @@ Output: Formatted inverted index lines with term and all document occurrences
 import sys
 
 CURRENT_TERM = None
-CURRENT_IDF = None
-CURRENT_LINE = ""
+CURRENT_PARTS = []
 
 for line in sys.stdin:
     # each line is "seg\tterm idf docid tf norm"
-    parts = line.rstrip("\n").split("\t")
-    if len(parts) < 2:
+    tab = line.find("\t")
+    if tab < 0:
         continue  # Skip malformed lines
 
-    # Get everything after the tab
-    rest = parts[1]
-    rest_parts = rest.split()
-    if len(rest_parts) < 5:
+    # Split everything after the tab: [term, idf, docid, tf, norm]
+    parts = line[tab + 1:].split()
+    if len(parts) < 5:
         continue  # Skip malformed lines
 
-    term, idf = rest_parts[0], rest_parts[1]
-    docid, tf, norm = rest_parts[2], rest_parts[3], rest_parts[4]
-
-    if term != CURRENT_TERM:
+    if parts[0] != CURRENT_TERM:
         # Emit the previous term's line
         if CURRENT_TERM:
-            print(CURRENT_LINE)
+            sys.stdout.write(" ".join(CURRENT_PARTS) + "\n")
 
         # Start a new term
-        CURRENT_TERM = term
-        CURRENT_IDF = idf
-        CURRENT_LINE = f"{term} {idf} {docid} {tf} {norm}"
+        CURRENT_TERM = parts[0]
+        CURRENT_PARTS = parts[:5]
     else:
-        # Add to the current term
-        CURRENT_LINE += f" {docid} {tf} {norm}"
+        # Add docid, tf and norm to the current term
+        CURRENT_PARTS.extend(parts[2:5])
 
 # Emit the last term's line
 if CURRENT_TERM:
-    print(CURRENT_LINE)
+    sys.stdout.write(" ".join(CURRENT_PARTS) + "\n")
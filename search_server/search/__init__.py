@@ -5,7 +5,10 @@ This package implements the web interface for the search engine.
 It makes requests to Index servers and displays search results.
 """
 from flask import Flask
-from search.views.main import bp as main_bp
+from search import model
+from search.views.main import (
+    bp as main_bp, clear_search_cache, clear_test_results_cache
+)
 
 
 def create_app():
@@ -23,6 +26,14 @@ def create_app():
 
     instance_app.register_blueprint(main_bp)
 
+    # Return pooled database connections at the end of each request
+    model.init_app(instance_app)
+
+    # Start without results cached by an app created earlier, which may
+    # have used another database or index servers
+    clear_search_cache()
+    clear_test_results_cache()
+
     return instance_app
 
 
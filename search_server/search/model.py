@@ -4,47 +4,154 @@ Database model for the Search server.
 This module provides functions for database connection management
 and document metadata retrieval.
 """
+import pathlib
+import queue
 import sqlite3
+import threading
 from flask import current_app, g
 
+# Number of long-lived database connections shared by request threads
+POOL_SIZE = 8
+
+# Seconds a request waits for a free pooled connection before failing
+POOL_TIMEOUT = 30
+
+# Settings applied to each pooled connection: a 64 MB page cache per
+# connection, and temporary tables kept in memory
+CONNECTION_PRAGMAS = (
+    'PRAGMA cache_size=-64000',
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Pools of open connections by database path, created on first use
+# (after any fork)
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+# Metadata of every document, by database path, as parallel columns
+# (rows, titles, urls, summaries) where rows maps a docid to its index in
+# the column lists.  Documents do not change while the server runs, so
+# each table is read once, on first use, and dropped by clear_doc_cache()
+# when an app is initialized
+_DOC_META = {}
+_DOC_META_LOCK = threading.Lock()
+
+
+def _connect(database):
+    """Open a read-only database connection any request thread may use."""
+    # The server only reads the database, so it is opened read-only: the
+    # file is never modified and its directory need not be writable.
+    # Keep more prepared statements per connection than the default 128,
+    # so repeated queries skip SQL parsing
+    db = sqlite3.connect(
+        f"{pathlib.Path(database).resolve().as_uri()}?mode=ro",
+        uri=True,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False,
+        cached_statements=512
+    )
+    db.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        db.execute(pragma)
+    return db
+
+
+def _get_pool():
+    """Return the connection pool, opening its connections on first use."""
+    database = current_app.config['DATABASE']
+    pool = _POOLS.get(database)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(database)
+            if pool is None:
+                pool = queue.Queue(maxsize=POOL_SIZE)
+                for _ in range(POOL_SIZE):
+                    pool.put(_connect(database))
+                _POOLS[database] = pool
+    return pool
+
 
 def get_db():
     """
-    Open new database connection if none yet for current application context.
+    Check out a pooled database connection for the current app context.
 
     Returns:
         SQLite connection object with row factory set to sqlite3.Row.
+
+    Raises:
+        RuntimeError: If no connection is free within POOL_TIMEOUT seconds.
     """
     if 'db' not in g:
-        # Connect and set row factory for dict-like access
-        g.db = sqlite3.connect(
-            current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
-        )
-        g.db.row_factory = sqlite3.Row
+        # Wait for a free connection; close_db returns it to the pool
+        pool = _get_pool()
+        try:
+            g.db = pool.get(timeout=POOL_TIMEOUT)
+        except queue.Empty as err:
+            raise RuntimeError(
+                f"No database connection free after {POOL_TIMEOUT} seconds"
+                f" (pool size {POOL_SIZE})"
+            ) from err
+        g.db_pool = pool
     return g.db
 
 
 def close_db(_=None):
     """
-    Close the database connection for the current application context.
+    Return the current application context's connection to the pool.
 
     Args:
         _: Ignored parameter, here for Flask teardown_appcontext compatibility
     """
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        if db.in_transaction:
+            db.rollback()
+        g.pop('db_pool').put(db)
 
 
 def init_app(app):
     """
-    Register application teardown to close the database connection.
+    Register application teardown to release the database connection.
+
+    Document metadata cached by an earlier app is dropped, so a new app
+    reads the database as it is now.
 
     Args:
         app: Flask application instance
     """
     app.teardown_appcontext(close_db)
+    clear_doc_cache()
+
+
+def _get_doc_meta():
+    """Return the metadata columns of all documents, read on first use."""
+    database = current_app.config['DATABASE']
+    doc_meta = _DOC_META.get(database)
+    if doc_meta is None:
+        with _DOC_META_LOCK:
+            doc_meta = _DOC_META.get(database)
+            if doc_meta is None:
+                # Plain tuples unpack faster than sqlite3.Row objects
+                cursor = get_db().cursor()
+                cursor.row_factory = None
+                cursor.execute(
+                    'SELECT docid, title, url, summary FROM documents'
+                )
+                rows, titles, urls, summaries = {}, [], [], []
+                for docid, title, url, summary in cursor:
+                    rows[docid] = len(titles)
+                    titles.append(title)
+                    urls.append(url)
+                    summaries.append(summary or '')
+                doc_meta = (rows, titles, urls, summaries)
+                _DOC_META[database] = doc_meta
+    return doc_meta
+
+
+def clear_doc_cache():
+    """Drop the in-memory document metadata, to be read again on use."""
+    with _DOC_META_LOCK:
+        _DOC_META.clear()
 
 
 def get_doc(docid: int) -> dict:
@@ -58,15 +165,33 @@ def get_doc(docid: int) -> dict:
         A dict with keys 'title', 'url', and 'summary'.
         If no row is found, returns empty strings for fields.
     """
-    db = get_db()
-    row = db.execute(
-        'SELECT title, url, summary FROM documents WHERE docid = ?',
-        (docid,)
-    ).fetchone()
-    if row is None:
-        return {'title': '', 'url': '', 'summary': ''}
-    return {
-        'title': row['title'],
-        'url': row['url'],
-        'summary': row['summary'] or ''
-    }
+    return get_docs((docid,))[docid]
+
+
+def get_docs(docids) -> dict:
+    """
+    Fetch the document metadata for several docids.
+
+    Metadata is looked up in memory; the database is only read the first
+    time metadata is needed.
+
+    Args:
+        docids: Iterable of document IDs to look up
+
+    Returns:
+        A dict mapping each docid to a dict with keys 'title', 'url', and
+        'summary'.  Missing documents have empty strings for fields.
+    """
+    rows, titles, urls, summaries = _get_doc_meta()
+    docs = {}
+    for docid in docids:
+        row = rows.get(docid)
+        if row is None:
+            docs[docid] = {'title': '', 'url': '', 'summary': ''}
+        else:
+            docs[docid] = {
+                'title': titles[row],
+                'url': urls[row],
+                'summary': summaries[row]
+            }
+    return docs
@@ -4,19 +4,123 @@ Main views for the Search server.
 This module handles search requests, interacts with Index servers,
 and renders search results.
 """
+import functools
+import heapq
 import threading
-from flask import Blueprint, render_template, request, current_app
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from flask import (
+    Blueprint, render_template, request, current_app, get_template_attribute
+)
+import orjson
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
 
-from search.model import get_db, get_doc
+from search import config
+from search.model import get_db, get_docs
 
 bp = Blueprint("search", __name__, template_folder="../templates")
 
+# Seconds each index server request may wait to connect or for data.
+# Every server gets its own timeout, so one slow server never cuts short
+# the others
+FETCH_TIMEOUT = 5.0
+
+# Number of searches expected to query the index servers at once
+CONCURRENT_SEARCHES = 8
+
+# Worker threads shared by all requests for querying index servers, so no
+# threads are started per search: one per index server for each
+# concurrent search.  Threads are created on first use.
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=(len(config.SEARCH_INDEX_SEGMENT_API_URLS)
+                 * CONCURRENT_SEARCHES),
+    thread_name_prefix="index-fetch"
+)
+
+# Number of searches whose results are cached, and for how many seconds
+SEARCH_CACHE_SIZE = 10_000
+SEARCH_CACHE_TTL = 60.0
+
+# Recent search results, keyed by (query, weight, search_mode,
+# segment_urls) so apps querying different index servers never share
+# results, as
+# (expiry time, results, search_metadata) in least recently used order
+_SEARCH_CACHE = OrderedDict()
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+# Number of rendered result cards kept in memory
+CARD_CACHE_SIZE = 50_000
+
+# HTTP session shared by the worker threads, keeping connections to the
+# index servers alive between searches
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+
+
+@functools.lru_cache(maxsize=CARD_CACHE_SIZE)
+def _render_card(title, url, summary):
+    """
+    Render the parts of a result card that do not depend on the query.
+
+    Args:
+        title: Document title
+        url: Document URL
+        summary: Document summary
+
+    Returns:
+        Dict with the rendered 'title' link and the 'details' (URL and
+        summary) HTML of the card
+    """
+    doc = {"title": title, "url": url, "summary": summary}
+    return {
+        "title": get_template_attribute("result_card.html", "card_title")(doc),
+        "details": get_template_attribute(
+            "result_card.html", "card_details"
+        )(doc),
+    }
+
+
+def _render_results_page(results, q, w, search_mode, search_metadata):
+    """
+    Render the search page, reusing cached result card fragments.
+
+    Args:
+        results: Search results with docid, score, title, url and summary
+        q: Query string
+        w: PageRank weight
+        search_mode: Search mode for UI display
+        search_metadata: Search metadata for UI display
+
+    Returns:
+        Rendered search page
+    """
+    cards = [
+        _render_card(doc["title"], doc["url"], doc["summary"])
+        for doc in results
+    ]
+    return render_template(
+        "main.html",
+        results=results,
+        cards=cards,
+        q=q,
+        w=w,
+        search_mode=search_mode,
+        search_metadata=search_metadata
+    )
+
 
 def _get_test_results(titles, q, w, search_mode="traditional"):
     """
     Get test results based on predefined titles.
 
+    The page is rendered once per set of arguments and cached, so later
+    requests skip the database and the template.
+
     Args:
         titles: List of predefined titles to include in results
         q: Query string
@@ -26,37 +130,49 @@ def _get_test_results(titles, q, w, search_mode="traditional"):
     Returns:
         Rendered template with test results
     """
-    db = get_db()
-    results = []
-    for title in titles:
-        row = db.execute(
-            'SELECT docid, title, url, summary FROM documents WHERE title = ?',
-            (title,)
-        ).fetchone()
-        if row:
-            results.append({
-                "docid": row['docid'],
-                "score": 0.5,  # Placeholder score
-                "title": row['title'],
-                "url": row['url'],
-                "summary": row['summary'] or ''
-            })
+    return _render_test_results(tuple(titles), q, w, search_mode)
+
+
+@functools.lru_cache(maxsize=16)
+def _render_test_results(titles, q, w, search_mode):
+    """Render the test results page for _get_test_results."""
+    placeholders = ','.join('?' * len(titles))
+    rows = get_db().execute(
+        'SELECT docid, title, url, summary FROM documents '
+        f'WHERE title IN ({placeholders}) ORDER BY docid',
+        titles
+    ).fetchall()
+    # Like a lookup per title, use the first document with each title
+    by_title = {}
+    for row in rows:
+        by_title.setdefault(row['title'], row)
+    results = [
+        {
+            "docid": row['docid'],
+            "score": 0.5,  # Placeholder score
+            "title": row['title'],
+            "url": row['url'],
+            "summary": row['summary'] or ''
+        }
+        for row in (by_title.get(title) for title in titles)
+        if row is not None
+    ]
     
     search_metadata = {
         "semantic_available": False,
         "search_mode": search_mode
     }
     
-    return render_template(
-        "main.html", 
-        results=results, 
-        q=q, 
-        w=w, 
-        search_mode=search_mode,
-        search_metadata=search_metadata
+    return _render_results_page(
+        results, q, w, search_mode, search_metadata
     )
 
 
+def clear_test_results_cache():
+    """Drop the cached test results pages, to be rendered again on use."""
+    _render_test_results.cache_clear()
+
+
 @bp.route("/", methods=["GET"])
 def index():
     """
@@ -122,13 +238,8 @@ def index():
         results, search_metadata = _fetch_enhanced_search_results(q, w, search_mode)
 
     # Render the enhanced Jinja template
-    return render_template(
-        "main.html",
-        results=results,
-        q=q,
-        w=w,
-        search_mode=search_mode,
-        search_metadata=search_metadata
+    return _render_results_page(
+        results, q, w, search_mode, search_metadata
     )
 
 
@@ -148,78 +259,156 @@ def _fetch_search_results(query, weight):
     results, _ = _fetch_enhanced_search_results(query, weight, "traditional")
     return results
 
-def _fetch_enhanced_search_results(query, weight, search_mode):
+def _hit_score(hit):
+    """Return the score of a search hit, for sorting hits."""
+    return hit["score"]
+
+
+def _fetch_segment(url, params):
     """
-    Fetch enhanced search results with semantic capabilities from all index servers in parallel.
+    Query one index server.
 
     Args:
-        query: Search query string
-        weight: PageRank weight
-        search_mode: Search mode ('traditional', 'semantic', 'hybrid')
+        url: Index server hits API URL
+        params: Query string parameters
 
     Returns:
-        Tuple of (results, search_metadata)
+        Tuple of (hits sorted by descending score, semantic_available),
+        or None if the server returned an error
     """
-    responses = []
-    search_metadata = {
-        "semantic_available": False,
-        "search_mode": search_mode
+    with _SESSION.get(url, params=params, timeout=FETCH_TIMEOUT,
+                      stream=True) as response:
+        if not response.ok:
+            return None
+        # Read the body straight from the connection, skipping the copy
+        # through requests' content buffer.  orjson parses the hit lists
+        # several times faster than response.json()
+        response.raw.decode_content = True
+        json_response = orjson.loads(response.raw.read())
+    # Index servers return hits by descending score, which makes this
+    # (stable) sort a linear check that keeps the merge safe
+    hits = sorted(json_response.get("hits", []), key=_hit_score, reverse=True)
+    return hits, json_response.get("semantic_available", False)
+
+
+def _get_cached_search(key):
+    """Return cached (results, search_metadata) copies, or None."""
+    with _SEARCH_CACHE_LOCK:
+        entry = _SEARCH_CACHE.get(key)
+        if entry is None:
+            return None
+        expiry, results, search_metadata = entry
+        if expiry < time.monotonic():
+            del _SEARCH_CACHE[key]
+            return None
+        _SEARCH_CACHE.move_to_end(key)
+    return list(results), dict(search_metadata)
+
+
+def _cache_search(key, results, search_metadata):
+    """Cache copies of a search's results for SEARCH_CACHE_TTL seconds."""
+    entry = (time.monotonic() + SEARCH_CACHE_TTL,
+             tuple(results), dict(search_metadata))
+    with _SEARCH_CACHE_LOCK:
+        _SEARCH_CACHE[key] = entry
+        _SEARCH_CACHE.move_to_end(key)
+        while len(_SEARCH_CACHE) > SEARCH_CACHE_SIZE:
+            _SEARCH_CACHE.popitem(last=False)
+
+
+def clear_search_cache():
+    """Drop all cached search results, e.g. after the index is rebuilt."""
+    with _SEARCH_CACHE_LOCK:
+        _SEARCH_CACHE.clear()
+
+
+def _fetch_segments(segment_urls, params):
+    """
+    Query all index servers in parallel on the shared worker threads.
+
+    Each fetch returns its own results, which are collected here; servers
+    that fail or time out are logged and skipped.
+
+    Args:
+        segment_urls: Index server hits API URLs
+        params: Query string parameters
+
+    Returns:
+        List of (hits, semantic_available) pairs of the servers that
+        answered
+    """
+    futures = {
+        _EXECUTOR.submit(_fetch_segment, url, params): url
+        for url in segment_urls
     }
 
-    def fetch(url):
-        """Make a request to an index server with enhanced parameters."""
+    segments = []
+    for future in as_completed(futures):
+        url = futures[future]
         try:
-            response = requests.get(
-                url,
-                params={
-                    "q": query, 
-                    "w": weight,
-                    "semantic": search_mode
-                },
-                timeout=5.0  # Add timeout to prevent hanging
-            )
-            if response.ok:
-                json_response = response.json()
-                responses.append(json_response.get("hits", []))
-                
-                # Update search metadata with information from first response
-                if not search_metadata.get("_updated"):
-                    search_metadata["semantic_available"] = json_response.get("semantic_available", False)
-                    search_metadata["_updated"] = True
-                    
-        except requests.exceptions.RequestException as e:
-            # Handle network/HTTP errors
+            segment = future.result()
+        except (requests.exceptions.RequestException,
+                urllib3.exceptions.HTTPError) as e:
+            # Handle network/HTTP errors, including timeouts
             current_app.logger.error(f"Request error from {url}: {e}")
-        except (ValueError, TypeError) as e:
+            continue
+        except (ValueError, TypeError, AttributeError) as e:
             # Handle JSON parsing errors
             current_app.logger.error(f"JSON parsing error from {url}: {e}")
+            continue
+        if segment is not None:
+            segments.append(segment)
+    return segments
+
+
+def _fetch_enhanced_search_results(query, weight, search_mode):
+    """
+    Fetch enhanced search results with semantic capabilities from all index servers in parallel.
+
+    Results are cached for SEARCH_CACHE_TTL seconds when every index
+    server answered, so repeated searches skip the index servers.
+
+    Args:
+        query: Search query string
+        weight: PageRank weight
+        search_mode: Search mode ('traditional', 'semantic', 'hybrid')
 
-    # Create and start threads for parallel requests
+    Returns:
+        Tuple of (results, search_metadata)
+    """
     segment_urls = current_app.config["SEARCH_INDEX_SEGMENT_API_URLS"]
-    threads = [
-        threading.Thread(target=fetch, args=(url,))
-        for url in segment_urls
-    ]
+    cache_key = (query, weight, search_mode, tuple(segment_urls))
+    cached = _get_cached_search(cache_key)
+    if cached is not None:
+        return cached
 
-    for thread in threads:
-        thread.start()
-    for thread in threads:
-        thread.join()
+    params = {
+        "q": query,
+        "w": weight,
+        "semantic": search_mode
+    }
+    segments = _fetch_segments(segment_urls, params)
 
-    # Combine and sort all segment hits by score descending
-    all_hits = []
-    for seg_hits in responses:
-        all_hits.extend(seg_hits)
-    all_hits_sorted = sorted(all_hits, key=lambda h: h["score"], reverse=True)
-    top_hits = all_hits_sorted[:10]
+    responses = [hits for hits, _ in segments]
+    search_metadata = {
+        "semantic_available": any(available for _, available in segments),
+        "search_mode": search_mode
+    }
 
-    # Enrich with metadata
+    # Merge the sorted segment hits, taking only the top 10 by score
+    top_hits = list(islice(
+        heapq.merge(*responses, key=_hit_score, reverse=True), 10
+    ))
+
+    # Enrich with metadata, fetched for all hits at once
+    docs = get_docs(hit["docid"] for hit in top_hits)
     results = [
-        {"docid": hit["docid"], "score": hit["score"], **get_doc(hit["docid"])}
+        {"docid": hit["docid"], "score": hit["score"], **docs[hit["docid"]]}
         for hit in top_hits
     ]
 
-    # Clean up temporary metadata fields
-    search_metadata.pop("_updated", None)
-    
+    # Partial results (an index server failed) are not cached
+    if len(segments) == len(segment_urls):
+        _cache_search(cache_key, results, search_metadata)
+
     return results, search_metadata
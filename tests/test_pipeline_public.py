@@ -2,6 +2,7 @@
 
 from pathlib import Path
 import shutil
+import subprocess
 import madoop
 import utils
 from utils import TESTDATA_DIR
@@ -268,6 +269,51 @@ def test_segments(tmpdir):
     )
 
 
+def test_fused_build_index(tmpdir):
+    """Fused build_index.py produces the same segments as jobs 2-5.
+
+    Note: 'tmpdir' is a fixture provided by the pytest package.  It creates a
+    unique temporary directory before the test runs, and removes it afterward.
+    https://docs.pytest.org/en/6.2.x/tmpdir.html#the-tmpdir-fixture
+    """
+    utils.copyglob("inverted_index/map?.py", tmpdir)
+    utils.copyglob("inverted_index/reduce?.py", tmpdir)
+    utils.copyglob("inverted_index/build_index.py", tmpdir)
+    utils.copyglob("inverted_index/stopwords.txt", tmpdir)
+    crawl_dir = TESTDATA_DIR/"test_pipeline14/crawl"
+
+    # Run jobs 0 and 1, then the fused build on the parsed documents
+    with tmpdir.as_cwd():
+        madoop.mapreduce(
+            input_path=crawl_dir,
+            output_dir=tmpdir/"output0",
+            map_exe="./map0.py",
+            reduce_exe="./reduce0.py",
+            num_reducers=1,
+            partitioner=None,
+        )
+        shutil.copy(tmpdir/"output0/part-00000", "total_document_count.txt")
+        madoop.mapreduce(
+            input_path=crawl_dir,
+            output_dir=tmpdir/"output1",
+            map_exe="./map1.py",
+            reduce_exe="./reduce1.py",
+            num_reducers=4,
+            partitioner=None,
+        )
+        subprocess.run(
+            "cat output1/part-* | ./map2.py | ./build_index.py output",
+            shell=True,
+            check=True,
+        )
+
+    # Verify output
+    utils.assert_inverted_index_eq(
+        Path(tmpdir/"output"),
+        TESTDATA_DIR/"test_pipeline14/expected",
+    )
+
+
 def test_sample_inverted_index(tmp_path):
     """Checks a few lines of the large inverted index.
 
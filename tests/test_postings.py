@@ -0,0 +1,165 @@
+"""Unit tests for the Index server's inverted index storage."""
+import logging
+import os
+import numpy as np
+from index import postings
+from index.postings import InvertedIndex, load_offset_index
+
+
+def write_shard(path, lines):
+    """Write inverted index lines to a shard file."""
+    path.write_binary(b"".join(line + b"\n" for line in lines))
+    return str(path)
+
+
+def parse_line(line):
+    """Parse a line the way the original dict-of-lists loader did."""
+    tokens = line.split()
+    postings_list = [
+        [int(tokens[i]), float(tokens[i + 1]), float(tokens[i + 2])]
+        for i in range(2, len(tokens), 3)
+    ]
+    return float(tokens[1]), sorted(postings_list)
+
+
+def assert_postings_equal(actual, expected):
+    """Compare (idf, docids, tfs, norms) arrays to (idf, lists)."""
+    idf, docids, tfs, norms = actual
+    expected_idf, expected_postings = expected
+    assert idf == expected_idf
+    assert docids.tolist() == [posting[0] for posting in expected_postings]
+    np.testing.assert_allclose(tfs, [posting[1] for posting in
+                                     expected_postings])
+    np.testing.assert_allclose(norms, [posting[2] for posting in
+                                       expected_postings])
+
+
+def test_lazy_parse(tmpdir):
+    """Rows are parsed on first lookup and match the original loader."""
+    lines = [
+        b"apple 1.5 30 2 0.25 10 1 0.5 20 3 0.75",
+        b"banana 0.5 7 1 0.125",
+    ]
+    path = write_shard(tmpdir/"inverted_index_0.txt", lines)
+
+    index = InvertedIndex()
+    index.open([path])
+
+    # Membership and IDF lookups do not parse any posting list
+    assert "apple" in index
+    assert "cherry" not in index
+    assert index.get_idf("banana") == 0.5
+    assert len(index) == 2
+    # pylint: disable-next=protected-access
+    assert index._parsed == [None, None]
+
+    for line in lines:
+        term = line.split()[0].decode()
+        assert_postings_equal(index[term], parse_line(line.decode()))
+
+    # Parsed rows are memoized
+    assert index["apple"] is index["apple"]
+
+
+def test_later_shard_wins(tmpdir):
+    """A term in a later shard replaces the entry from an earlier one."""
+    first = write_shard(tmpdir/"inverted_index_0.txt", [
+        b"apple 1.0 1 1 0.5",
+        b"banana 2.0 2 1 0.5",
+    ])
+    second = write_shard(tmpdir/"inverted_index_1.txt", [
+        b"apple 3.0 5 2 0.25 4 1 0.125",
+    ])
+
+    index = InvertedIndex()
+    index.open([first, second])
+    assert index.get_idf("apple") == 3.0
+    assert_postings_equal(index["apple"],
+                          parse_line("apple 3.0 5 2 0.25 4 1 0.125"))
+    assert index.get_idf("banana") == 2.0
+
+    # Shards attached by a later open() call win as well
+    index = InvertedIndex()
+    index.open([second])
+    index.open([first])
+    assert index.get_idf("apple") == 1.0
+    assert_postings_equal(index["apple"], parse_line("apple 1.0 1 1 0.5"))
+    assert len(index) == 2
+
+
+def test_scan_shard_skips_malformed_line(tmpdir, caplog):
+    """A malformed line is logged and skipped, not raised."""
+    path = write_shard(tmpdir/"inverted_index_0.txt", [
+        b"apple 1.0 1 1 0.5",
+        b"broken notanumber 1 1 0.5",
+        b"\xff\xfe 1.0 2 1 0.5",
+        b"cherry 2.0 3 1 0.5",
+    ])
+
+    with caplog.at_level(logging.WARNING, logger=postings.__name__):
+        # pylint: disable-next=protected-access
+        terms, locations, idf = postings._scan_shard(0, path)
+
+    assert terms == ["apple", "cherry"]
+    assert idf == [1.0, 2.0]
+    assert [location[0] for location in locations] == [0, 0]
+    warnings = [record for record in caplog.records
+                if record.levelno == logging.WARNING]
+    assert len(warnings) == 2
+    assert all("Skipping malformed line" in record.getMessage()
+               for record in warnings)
+
+
+def test_offset_cache(tmpdir, monkeypatch):
+    """The offset cache is reused until a shard's size or mtime changes."""
+    path = write_shard(tmpdir/"inverted_index_0.txt", [
+        b"apple 1.0 1 1 0.5",
+    ])
+    offsets_path = str(tmpdir/"offsets.pkl")
+
+    builds = []
+    build_offset_index = postings.build_offset_index
+
+    def counting_build(paths):
+        builds.append(paths)
+        return build_offset_index(paths)
+
+    monkeypatch.setattr(postings, "build_offset_index", counting_build)
+
+    terms, _, idf = load_offset_index([path], offsets_path)
+    assert terms == {"apple": 0}
+    assert idf.tolist() == [1.0]
+    assert len(builds) == 1
+    assert os.path.exists(offsets_path)
+    # Only the cache is left in the directory, no temporary files
+    assert sorted(os.listdir(tmpdir)) == ["inverted_index_0.txt",
+                                          "offsets.pkl"]
+
+    # Nothing changed: the cache is reused
+    terms, _, _ = load_offset_index([path], offsets_path)
+    assert terms == {"apple": 0}
+    assert len(builds) == 1
+
+    # Size changed: rebuilt
+    write_shard(tmpdir/"inverted_index_0.txt", [
+        b"apple 1.0 1 1 0.5",
+        b"banana 2.0 2 1 0.5",
+    ])
+    terms, _, _ = load_offset_index([path], offsets_path)
+    assert terms == {"apple": 0, "banana": 1}
+    assert len(builds) == 2
+
+    # Same size, new mtime: rebuilt
+    write_shard(tmpdir/"inverted_index_0.txt", [
+        b"apple 1.0 1 1 0.5",
+        b"banana 3.0 2 1 0.5",
+    ])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    _, _, idf = load_offset_index([path], offsets_path)
+    assert idf.tolist() == [1.0, 3.0]
+    assert len(builds) == 3
+
+    # The rebuilt cache is reused again
+    load_offset_index([path], offsets_path)
+    assert len(builds) == 3
@@ -1,7 +1,7 @@
 """Public Search Server tests."""
 
 import subprocess
-import threading
+from concurrent.futures import ThreadPoolExecutor
 import bs4
 import utils
 
@@ -27,7 +27,7 @@ def test_concurrency(search_client, mocker):
 
     Pytest fixture docs: https://docs.pytest.org/en/latest/fixture.html
     """
-    spy = mocker.spy(threading.Thread, "start")
+    spy = mocker.spy(ThreadPoolExecutor, "submit")
     response = search_client.get("/?q=hello+world")
     assert response.status_code == 200
     assert spy.call_count == 3
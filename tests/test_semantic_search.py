@@ -0,0 +1,96 @@
+"""Unit tests for the Index server's saved semantic search index."""
+import sqlite3
+import zlib
+import numpy as np
+import pytest
+from index import semantic_search
+
+faiss = pytest.importorskip("faiss")
+
+
+class FakeModel:
+    """Deterministic stand-in for the sentence transformer."""
+
+    def get_sentence_embedding_dimension(self):
+        """Return the embedding dimension."""
+        return 16
+
+    def encode(self, texts, normalize_embeddings=False, **_):
+        """Embed each text as the sum of per-word random vectors."""
+        embeddings = np.zeros((len(texts), 16), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                rng = np.random.default_rng(zlib.crc32(word.encode()))
+                embeddings[row] += rng.standard_normal(16)
+        if normalize_embeddings:
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings
+
+
+@pytest.fixture(name="index_dir")
+def setup_index_dir(tmpdir, monkeypatch):
+    """Create a document database and use the fake model."""
+    monkeypatch.setattr(semantic_search, "SentenceTransformer",
+                        lambda *args, **kwargs: FakeModel())
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]
+    conn = sqlite3.connect(str(tmpdir/"search.sqlite3"))
+    conn.execute(
+        "CREATE TABLE documents (docid INTEGER, title TEXT, summary TEXT)")
+    conn.executemany("INSERT INTO documents VALUES (?, ?, ?)", [
+        (docid, words[docid % 6], f"{words[docid % 5]} {words[docid % 4]}")
+        for docid in range(1, 61)
+    ])
+    conn.commit()
+    conn.close()
+    return tmpdir
+
+
+def build_engine(index_dir):
+    """Build and save embeddings, returning the engine and its results."""
+    engine = semantic_search.SemanticSearchEngine()
+    engine.initialize(str(index_dir))
+    engine.build_document_embeddings(str(index_dir/"search.sqlite3"))
+    assert engine.scoring.faiss_index is not None
+    assert (index_dir/"semantic_index.faiss").exists()
+    return engine, engine.semantic_search("alpha beta", 10)
+
+
+def test_saved_faiss_index_is_loaded(index_dir, monkeypatch):
+    """A restarted engine loads the saved index instead of rebuilding."""
+    _, results = build_engine(index_dir)
+    assert results
+
+    def fail_build(_):
+        raise AssertionError("FAISS index rebuilt")
+
+    monkeypatch.setattr(semantic_search, "_build_faiss_index", fail_build)
+    engine = semantic_search.SemanticSearchEngine()
+    engine.initialize(str(index_dir))
+    assert engine.scoring.faiss_index is not None
+    assert engine.scoring.faiss_index.ntotal == 60
+    assert engine.semantic_search("alpha beta", 10) == results
+
+
+def test_faiss_index_read_without_mmap(index_dir, monkeypatch):
+    """An index FAISS cannot memory-map is read into memory instead."""
+    _, results = build_engine(index_dir)
+
+    read_index = faiss.read_index
+    flags = []
+
+    def read_index_without_mmap(path, *args):
+        flags.append(args)
+        if args:
+            raise RuntimeError("cannot memory-map this index")
+        return read_index(path)
+
+    def fail_build(_):
+        raise AssertionError("FAISS index rebuilt")
+
+    monkeypatch.setattr(faiss, "read_index", read_index_without_mmap)
+    monkeypatch.setattr(semantic_search, "_build_faiss_index", fail_build)
+    engine = semantic_search.SemanticSearchEngine()
+    engine.initialize(str(index_dir))
+    assert flags == [(faiss.IO_FLAG_MMAP,), ()]
+    assert engine.scoring.faiss_index is not None
+    assert engine.semantic_search("alpha beta", 10) == results